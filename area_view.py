@@ -3,7 +3,9 @@ import copy
 from helpers import safe_element_list_get, safe_element_dict_get, DefaultAppValues
 from labels import Labels
 from logger import logger
-from style import Style
+from section import Section
+from section_rules import SectionRules
+from sections import Sections
 
 
 class AreaView:
@@ -24,8 +26,10 @@ class AreaView:
                  style,
                  area_config=[],
                  labels=None,
-                 is_subarea = False):
+                 is_subarea = False,
+                 rules=None):
         self.sections = sections
+        self.rules = rules
         self.processed_section_views = []
         self.is_subarea = is_subarea
         self.area = area_config
@@ -48,8 +52,18 @@ class AreaView:
         self.title = safe_element_dict_get(self.area, 'title', DefaultAppValues.TITLE)
         self.address_to_pxl = (self.end_address - self.start_address) / self.size_y
 
+        level_of_detail = safe_element_dict_get(self.area, 'level-of-detail', None)
+        self.merge_min_size = safe_element_dict_get(level_of_detail, 'min-size',
+                                                    DefaultAppValues.MERGE_MIN_SIZE)
+        self.merge_max_gap = safe_element_dict_get(level_of_detail, 'max-gap',
+                                                   DefaultAppValues.MERGE_MAX_GAP)
+        # Sections to be drawn, where the ones too small to be seen are merged together
+        self.drawn_sections = self.sections
+
         if not self.is_subarea:
             self._process()
+            for area_view in self.processed_section_views:
+                area_view._merge_small_sections()
 
     def get_split_area_views(self):
         """
@@ -89,13 +103,14 @@ class AreaView:
         Overrides default style (normally style defined by the area it is at) and flags information
         on a section given a new definition is provided for an specific section at the map or
         configuration files
-        """
-
-        for section in self.sections.get_sections():
-
-            section_style = copy.deepcopy(self.style)
-            section.style = section_style
 
+        Sections are shared among all areas, so the area works on views of them. Views share the
+        area style, and overridden ones, or the ones of sections with a style of their own, get
+        the shared style derived from it. Override rules are
+        compiled from the area configuration, unless they were already given compiled
+        """
+        rules = self.rules
+        if rules is None:
             inner_sections = safe_element_dict_get(self.area, 'sections', [])
 
             if inner_sections is None:
@@ -103,24 +118,105 @@ class AreaView:
                     "'sections' property is declared but is empty. Field has been ignored")
                 inner_sections = []
 
-            for element in inner_sections:
+            rules = SectionRules(inner_sections)
+
+        section_views = []
+
+        for section in self.sections.get_sections():
+
+            section_view = section.view()
+            section_view.style = self.style.derive(section.style) if section.has_own_style() \
+                else self.style
 
-                section_names = safe_element_dict_get(element, 'names', [])
+            for element in rules.get_rules(section_view.id):
+                # OVERWRITE style, address, size and type if needed
+                section_view.style = section_view.style.derive(element.get('style'))
+                section_view.address = element.get('address', section_view.address)
+                section_view.type = element.get('type', section_view.type)
+                section_view.size = element.get('size', section_view.size)
+                # As flags can be defined previously at map file, APPEND whatever is new
+                section_view.add_flags(element.get('flags', 0))
 
-                if section_names is None:
-                    logger.warning(
-                        "'sections' property is declared but is empty. Field has been ignored")
-                    section_names = []
+            section_views.append(section_view)
 
-                for item in section_names:
-                    if item == section.id:
-                        # OVERWRITE style, address, size and type if needed
-                        section_style.override_properties_from(Style(style=element.get('style')))
-                        section.address = element.get('address', section.address)
-                        section.type = element.get('type', section.type)
-                        section.size = element.get('size', section.size)
-                        # As flags can be defined previously at map file, APPEND whatever is new
-                        section.flags += element.get('flags', section.flags)
+        self.sections = Sections(sections=section_views)
+
+    def _merge_small_sections(self):
+        """
+        Merge adjacent sections too small to be seen into aggregated sections
+
+        Sections smaller than `merge_min_size` pixels, that are at most `merge_max_gap` pixels
+        apart, are drawn as a single section named after the number of merged sections and
+        their total size. Break, growing and hidden sections, as well as sections with a style of
+        their own, are never merged. Merged sections are only left out of the drawing, they are
+        still available for links and labels
+        """
+        self.drawn_sections = self.sections
+        if not self.merge_min_size:
+            return
+
+        def is_mergeable(_section):
+            return _section.style is self.style and \
+                not (_section.is_break() or _section.is_hidden() or _section.is_grow_up() or
+                     _section.is_grow_down()) and \
+                self.to_pixels(_section.size) < self.merge_min_size
+
+        # Runs of adjacent small sections, in address order
+        runs = []
+        run = []
+        run_end = None
+        for section in sorted(self.sections.get_sections(), key=lambda x: x.address):
+            if not is_mergeable(section):
+                if len(run) > 0:
+                    runs.append(run)
+                run = []
+                continue
+
+            if len(run) > 0 and self.to_pixels(section.address - run_end) > self.merge_max_gap:
+                runs.append(run)
+                run = []
+
+            if len(run) == 0:
+                run_end = section.address + section.size
+            run.append(section)
+            run_end = max(run_end, section.address + section.size)
+
+        if len(run) > 0:
+            runs.append(run)
+
+        merged_sections = {}
+        for run in runs:
+            if len(run) < 2:
+                continue
+
+            start = run[0].address
+            end = max(section.address + section.size for section in run)
+            parents = {section.parent for section in run}
+            merged = Section(size=end - start,
+                             address=start,
+                             id=Section.MERGED_ID,
+                             _type='section',
+                             parent=parents.pop() if len(parents) == 1 else None,
+                             name=f"{len(run)} sections, {sum(x.size for x in run)} bytes")
+            merged.style = self.style
+            for section in run:
+                merged_sections[id(section)] = merged
+
+        if len(merged_sections) == 0:
+            return
+
+        # Keep the original drawing order, placing each merged section where its first member was
+        drawn_sections = []
+        added = set()
+        for section in self.sections.get_sections():
+            merged = merged_sections.get(id(section))
+            if merged is None:
+                drawn_sections.append(section)
+            elif id(merged) not in added:
+                added.add(id(merged))
+                drawn_sections.append(merged)
+
+        self.drawn_sections = Sections(sections=drawn_sections)
 
     def _process(self):
         def recalculate_subarea_size_y(start_mem_addr, end_mem_addr):
@@ -0,0 +1,134 @@
+import mmap
+import re
+
+from map_parser import MapParser, RELEASE_SIZE
+from section import Section
+
+_HEX = rb'0x([0-9a-fA-F]+)'
+
+# Every line of interest of a map file, in a single pattern so the map file is searched only once
+RECORD_PATTERN = re.compile(
+    rb'\n(?:'
+    # Headers of the parts of the map file, at the first column
+    rb'([A-Z][^\r\n]*)'
+    # Load regions: `  Load Region LR_IROM1 (Base: 0x08000000, Size: 0x000002a4, Max: 0x00010000`
+    rb'| +Load Region (\S+) \(Base: ' + _HEX + rb', Size: ' + _HEX +
+    rb'(?:, Max: ' + _HEX + rb')?'
+    # Execution regions, with a load base since armlink 5:
+    # `    Execution Region RW_IRAM1 (Exec base: 0x20000000, Load base: 0x08000290, Size: 0x00000418`
+    rb'| +Execution Region (\S+) \((?:Exec base|Base): ' + _HEX +
+    rb', (?:Load base: ' + _HEX + rb', )?Size: ' + _HEX +
+    # Rows of the memory map, with a load address since armlink 5, or `-` if not loaded:
+    # `    0x08000250   0x08000250   0x00000028   Code   RO   10    i.main    main.o`
+    rb'| +' + _HEX + rb' +(?:' + _HEX + rb' +|- +)?' + _HEX + rb' +(?:PAD|(?:Code|Data|Zero) +\S+ +'
+    rb'[0-9]+ +(?:\* +)?(\S+) +([^\r\n]*\S))'
+    # Code and data symbols of the symbol table:
+    # `    main                                     0x08000251   Thumb Code    40  main.o(i.main)`
+    rb'| +(\S+) +' + _HEX + rb' +((?:ARM |Thumb )?Code|Data) +([0-9]+) +([^\r\n(]*)'
+    rb')')
+
+SYMBOL_TABLE_HEADER = b'Image Symbol Table'
+MEMORY_MAP_HEADER = b'Memory Map of the image'
+
+
+class ArmlinkMapParser(MapParser):
+    """
+    Parse an Arm Compiler (Keil MDK) armlink map file (`--map --symbols --list`) into a list of
+    sections for further processing
+
+    Load regions are parsed as memory regions, execution regions as areas, with the load address
+    of the ones copied at startup, and the rows of the memory map as input sections, with the
+    object or library member they come from as origin, or as fills for padding. Code and data
+    symbols are parsed from the symbol table with their address, without the Thumb bit of Thumb
+    code, and size. The symbol table is listed before the memory map, so symbols have no parent
+    """
+    @staticmethod
+    def sniff(header: bytes) -> bool:
+        return b'Tool: armlink' in header or b'Tool: armLink' in header or \
+            SYMBOL_TABLE_HEADER in header or MEMORY_MAP_HEADER in header
+
+    def _iter_buffer_sections(self, parts):
+        symbol_table = False
+        memory_map = False
+        area = None
+
+        for buffer, start, end in parts:
+            can_release = self._can_release(buffer)
+            released = start - start % mmap.PAGESIZE
+
+            for record in RECORD_PATTERN.finditer(buffer, start, end):
+                header, region_name, region_address, region_size, region_max, \
+                    area_name, area_address, area_lma, area_size, \
+                    address, lma, size, name, origin, \
+                    symbol_name, symbol_address, symbol_type, symbol_size, symbol_origin = \
+                    record.groups()
+
+                if can_release and record.start() - released > RELEASE_SIZE:
+                    released = self._release_parsed(buffer, released, record.start())
+
+                if address is not None:
+                    if not memory_map:
+                        continue
+                    address = int(address, 16)
+                    if name is None:
+                        yield Section(parent=None if area is None else area.id,
+                                      id='*fill*',
+                                      address=address,
+                                      size=int(size, 16),
+                                      _type='fill'
+                                      )
+                        continue
+
+                    lma = None if lma is None else int(lma, 16)
+                    yield Section(parent=None if area is None else area.id,
+                                  id=self.get_section_id(name.decode('utf8')),
+                                  address=address,
+                                  size=int(size, 16),
+                                  _type='section',
+                                  lma=None if lma == address else lma,
+                                  origin=origin.decode('utf8')
+                                  )
+
+                elif symbol_name is not None:
+                    if not symbol_table:
+                        continue
+                    symbol_address = int(symbol_address, 16)
+                    if symbol_type == b'Thumb Code':
+                        symbol_address &= ~1
+                    yield Section(parent=None,
+                                  id=symbol_name.decode('utf8'),
+                                  address=symbol_address,
+                                  size=int(symbol_size),
+                                  _type='symbol',
+                                  origin=symbol_origin.rstrip().decode('utf8') or None
+                                  )
+
+                elif area_name is not None:
+                    if not memory_map:
+                        continue
+                    address = int(area_address, 16)
+                    lma = None if area_lma is None else int(area_lma, 16)
+                    area = Section(parent=None,
+                                   id=area_name.decode('utf8'),
+                                   address=address,
+                                   size=int(area_size, 16),
+                                   _type='area',
+                                   lma=None if lma == address else lma
+                                   )
+                    yield area
+
+                elif region_name is not None:
+                    if not memory_map:
+                        continue
+                    area = None
+                    yield Section(parent=None,
+                                  id=region_name.decode('utf8'),
+                                  address=int(region_address, 16),
+                                  size=int(region_max or region_size, 16),
+                                  _type='region'
+                                  )
+
+                else:
+                    symbol_table = header.startswith(SYMBOL_TABLE_HEADER)
+                    memory_map = header.startswith(MEMORY_MAP_HEADER)
+                    area = None
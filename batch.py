@@ -0,0 +1,182 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from helpers import get_process_context, safe_element_dict_get
+from linkerscope import load_config, load_map, render
+from logger import logger
+from yaml_io import load_yaml
+
+# Loaded maps, by input file name, available to the worker processes
+_worker_maps = {}
+# Loaded configurations, by configuration file name, at each worker process
+_worker_configurations = {}
+
+
+@dataclass
+class BatchJob:
+    """
+    One diagram to be rendered from a batch manifest
+    """
+    input: str
+    output: str
+    config: str = None
+    parse_time: float = 0
+    render_time: float = 0
+    error: str = None
+
+
+def load_manifest(filename) -> [BatchJob]:
+    """
+    Load the jobs of a batch manifest
+
+    Manifest is a .yaml file with a `jobs` list, where each job has an `input` map file, an
+    `output` file and, optionally, a `config` file. Relative paths are relative to the manifest
+    location
+
+    :param filename: Name of the manifest file
+    :return: List of jobs, in the same order as in the manifest
+    """
+    with open(filename, 'r', encoding='utf-8') as file:
+        manifest = load_yaml(file)
+
+    directory = os.path.dirname(os.path.abspath(filename))
+
+    def get_path(path):
+        return None if path is None else os.path.join(directory, path)
+
+    jobs = []
+    for i, element in enumerate(safe_element_dict_get(manifest, 'jobs', []) or []):
+        _input = safe_element_dict_get(element, 'input', None)
+        output = safe_element_dict_get(element, 'output', None)
+        if _input is None or output is None:
+            logger.error(f"Job with index {i} at batch manifest requires both 'input' and "
+                         f"'output' files")
+            raise SystemExit(-1)
+
+        jobs.append(BatchJob(input=get_path(_input),
+                             output=get_path(output),
+                             config=get_path(safe_element_dict_get(element, 'config', None))))
+
+    return jobs
+
+
+def _init_worker(maps):
+    """
+    Make the parsed maps available to a worker process
+    """
+    _worker_maps.update(maps)
+
+
+def _render_job(job: BatchJob, render_options):
+    """
+    Render a single job with the maps available to the current process
+
+    :return: A tuple with the elapsed render time in seconds, and an error message if it failed
+    """
+    start = time.perf_counter()
+    try:
+        configuration = None
+        if job.config is not None:
+            if job.config not in _worker_configurations:
+                _worker_configurations[job.config] = load_config(job.config)
+            configuration = _worker_configurations[job.config]
+
+        render(_worker_maps[job.input], configuration, job.output, **render_options)
+    except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+        return time.perf_counter() - start, f"{type(error).__name__}: {error}"
+
+    return time.perf_counter() - start, None
+
+
+def _parse_maps(jobs: [BatchJob], use_cache, workers) -> {}:
+    """
+    Parse every distinct map file of a list of jobs only once, each one with up to `workers`
+    processes
+
+    :return: Dictionary of loaded maps by input file name, only for the maps that could be
+             parsed. Jobs whose map could not be parsed are marked as failed
+    """
+    maps = {}
+    jobs_by_input = {}
+    for job in jobs:
+        jobs_by_input.setdefault(job.input, []).append(job)
+
+    for _input, input_jobs in jobs_by_input.items():
+        start = time.perf_counter()
+        error = None
+        try:
+            maps[_input] = load_map(_input, use_cache=use_cache, jobs=workers)
+        except (Exception, SystemExit) as e:  # pylint: disable=broad-except
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+
+        for job in input_jobs:
+            job.parse_time = elapsed
+            job.error = error
+
+    return maps
+
+
+def print_summary(jobs: [BatchJob], maps_count, elapsed):
+    """
+    Print a table with the parse and render time of each job
+    """
+    def get_name(path):
+        if path is None:
+            return '-'
+        relative_path = os.path.relpath(path)
+        return path if relative_path.startswith('..') else relative_path
+
+    rows = [(str(i), get_name(job.input), get_name(job.config), get_name(job.output),
+             f"{job.parse_time:.3f} s", f"{job.render_time:.3f} s",
+             'ok' if job.error is None else f"failed ({job.error})")
+            for i, job in enumerate(jobs)]
+    header = ('job', 'input', 'config', 'output', 'parse', 'render', 'status')
+    widths = [max(len(row[column]) for row in rows + [header]) for column in range(len(header) - 1)]
+
+    for row in [header] + rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)) + '  ' + row[-1])
+
+    failed = sum(1 for job in jobs if job.error is not None)
+    print(f"{len(jobs)} jobs, {maps_count} maps parsed, {failed} failed, {elapsed:.3f} s total")
+
+
+def run_batch(manifest_filename, workers=None, use_cache=True, **render_options) -> int:
+    """
+    Render all the jobs of a batch manifest
+
+    Each distinct map file is parsed only once, and shared across all the jobs using it. Jobs are
+    then rendered in a pool of worker processes
+
+    :param manifest_filename: Name of the manifest file
+    :param workers: Number of worker processes. Defaults to the number of CPUs
+    :param use_cache: Whether to use the parsed map cache
+    :param render_options: Drawing options, as taken by `render()`
+    :return: Exit code, 0 if all jobs succeeded
+    """
+    start = time.perf_counter()
+    jobs = load_manifest(manifest_filename)
+    maps = _parse_maps(jobs, use_cache, workers or os.cpu_count() or 1)
+    pending = [job for job in jobs if job.error is None]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(pending), 1))
+
+    if workers == 1:
+        _init_worker(maps)
+        results = [_render_job(job, render_options) for job in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=get_process_context(),
+                                 initializer=_init_worker,
+                                 initargs=(maps,)) as executor:
+            results = list(executor.map(_render_job, pending, [render_options] * len(pending)))
+
+    for job, (render_time, error) in zip(pending, results):
+        job.render_time = render_time
+        job.error = error
+
+    print_summary(jobs, len(maps), time.perf_counter() - start)
+
+    return 0 if all(job.error is None for job in jobs) else 1
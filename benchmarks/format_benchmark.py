@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load time and peak memory comparison of the supported map interchange formats
+
+Parses a synthetic map file once, exports it to every supported format and then measures how
+long it takes, and how much memory is needed, to load the sections back from each of them.
+Execute from the repository root:
+
+    python benchmarks/format_benchmark.py --size 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from gnu_linker_map_parser import GNULinkerMapParser
+from map_cache import MapCache
+from map_file_loader import MapFileLoader
+from synthetic_map import generate
+from yaml_io import YamlLoader
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size',
+                        help='Size in MB of the synthetic map file',
+                        type=float,
+                        default=10)
+    return parser.parse_args()
+
+
+def load_pure_python_yaml(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        y = yaml.load(file, Loader=yaml.SafeLoader)
+    return MapFileLoader.get_sections_from_elements(y['map'])
+
+
+def measure(function, filename):
+    """
+    Measure the time and peak memory needed to load a file
+
+    Both are measured at separate runs, since tracing memory allocations slows execution down
+    :return: A tuple with the elapsed time in seconds and the peak memory in MB
+    """
+    start = time.perf_counter()
+    function(filename)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak / (1024 * 1024)
+
+
+def run(size_mb):
+    with tempfile.TemporaryDirectory() as directory:
+        map_filename = os.path.join(directory, 'synthetic.map')
+        yaml_filename = os.path.join(directory, 'synthetic.yaml')
+        json_filename = os.path.join(directory, 'synthetic.json')
+
+        generate(map_filename, int(size_mb * 1024 * 1024))
+        sections = GNULinkerMapParser(map_filename).parse()
+        MapFileLoader.export_yaml(sections, yaml_filename)
+        MapFileLoader.export_json(sections, json_filename)
+
+        cache = MapCache(directory=os.path.join(directory, 'cache'))
+        key = cache.get_key(map_filename, GNULinkerMapParser.VERSION)
+        cache.store(key, sections)
+        cache_filename = os.path.join(cache.directory, key + MapCache.EXTENSION)
+
+        candidates = [
+            ('.map (parse)', map_filename, lambda f: GNULinkerMapParser(f).parse()),
+            # The loader used by LinkerScope is CSafeLoader when PyYAML was built with LibYAML,
+            # compared with the pure Python one
+            ('.yaml (SafeLoader)', yaml_filename, load_pure_python_yaml),
+            (f'.yaml ({YamlLoader.__name__})', yaml_filename, MapFileLoader.parse_yaml),
+            ('.json', json_filename, MapFileLoader.parse_json),
+            ('cache', cache_filename, lambda _: cache.load(key)),
+        ]
+
+        print(f"{len(sections)} sections")
+        print(f"{'format':<24}{'file size':>12}{'load time':>12}{'peak memory':>14}")
+        for name, filename, function in candidates:
+            elapsed, peak = measure(function, filename)
+            file_size = os.path.getsize(filename) / (1024 * 1024)
+            print(f"{name:<24}{file_size:>9.1f} MB{elapsed:>10.3f} s{peak:>11.1f} MB")
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    run(arguments.size)
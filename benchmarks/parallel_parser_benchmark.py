@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark of the parallel GNU linker map parser
+
+Generates a synthetic map file and parses it with 1 to N worker processes, reporting the parse
+time and speedup over a serial parse for each number of processes. Results of every parallel
+parse are checked to be identical to the serial ones. Execute from the repository root:
+
+    python benchmarks/parallel_parser_benchmark.py --size 100 --max-jobs 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from gnu_linker_map_parser import GNULinkerMapParser
+from synthetic_map import generate
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size',
+                        help='Size in MB of the synthetic map file',
+                        type=float,
+                        default=50)
+    parser.add_argument('--max-jobs',
+                        help='Maximum number of worker processes. Defaults to the number of CPUs',
+                        type=int,
+                        default=os.cpu_count() or 1)
+    parser.add_argument('--repeat',
+                        help='Number of parsing rounds for each number of processes, best one is '
+                             'reported',
+                        type=int,
+                        default=3)
+    return parser.parse_args()
+
+
+def get_results(sections):
+    return [(section.type, section.parent, section.id, section.address, section.size,
+             section.lma, section.origin)
+            for section in sections]
+
+
+def run(size_mb, max_jobs, repeat) -> bool:
+    """
+    :return: True if all the parallel parses got the same results as the serial one
+    """
+    identical = True
+    with tempfile.TemporaryDirectory() as directory:
+        map_filename = os.path.join(directory, 'synthetic.map')
+        generate(map_filename, int(size_mb * 1024 * 1024))
+        print(f"map size:    {os.path.getsize(map_filename) / (1024 * 1024):.1f} MB")
+        print(f"{'jobs':>4}{'chunks':>8}{'time':>10}{'speedup':>9}  results")
+
+        serial_time = None
+        serial_results = None
+        for jobs in range(1, max_jobs + 1):
+            best = None
+            results = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results = GNULinkerMapParser(map_filename).parse(jobs)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            results = get_results(results)
+            if serial_results is None:
+                serial_time, serial_results = best, results
+            same = results == serial_results
+            identical = identical and same
+
+            chunks = len(GNULinkerMapParser(map_filename).get_chunks(jobs)) if jobs > 1 else 1
+            print(f"{jobs:>4}{chunks:>8}{best:>8.3f} s{serial_time / best:>8.2f}x  "
+                  f"{'identical' if same else 'DIFFERENT'}")
+
+    return identical
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    sys.exit(0 if run(arguments.size, arguments.max_jobs, arguments.repeat) else 1)
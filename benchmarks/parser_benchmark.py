@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the GNU linker map parser
+
+Generates a synthetic multi-megabyte map file and reports parsing throughput both in MB/s and
+in sections/s, so regressions on the parser can be tracked. Execute from the repository root:
+
+    python benchmarks/parser_benchmark.py --size 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from gnu_linker_map_parser import GNULinkerMapParser
+from synthetic_map import generate
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size',
+                        help='Size in MB of the synthetic map file',
+                        type=float,
+                        default=20)
+    parser.add_argument('--repeat',
+                        help='Number of parsing rounds, best one is reported',
+                        type=int,
+                        default=3)
+    return parser.parse_args()
+
+
+def run(size_mb, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        map_filename = os.path.join(directory, 'synthetic.map')
+        generate(map_filename, int(size_mb * 1024 * 1024))
+        file_size_mb = os.path.getsize(map_filename) / (1024 * 1024)
+
+        best = None
+        sections_count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sections_count = sum(1 for _ in GNULinkerMapParser(map_filename).iter_sections())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+    print(f"map size:    {file_size_mb:.1f} MB")
+    print(f"sections:    {sections_count}")
+    print(f"parse time:  {best:.3f} s")
+    print(f"throughput:  {file_size_mb / best:.1f} MB/s, {sections_count / best:.0f} sections/s")
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    run(arguments.size, arguments.repeat)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Memory footprint comparison between the compact `Section` class and its previous layout
+
+The previous layout, kept here as `LegacySection`, had an instance `__dict__`, its own `Style`
+instance and a list of flags per section. Execute from the repository root:
+
+    python benchmarks/section_memory_benchmark.py --count 200000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from section import Section
+from style import Style
+
+
+class LegacySection:
+    """
+    Memory layout of `Section` before it was made compact
+    """
+    def __init__(self, size, address, id, _type, parent, flags=None, name=None):
+        # pylint: disable=redefined-builtin
+        self.type = _type
+        self.parent = parent
+        self.size = size
+        self.address = address
+        self.id = id
+        self.name = name
+        self.size_y = 0
+        self.size_x = 0
+        self.style = Style()
+        self.flags = flags if flags is not None else []
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count',
+                        help='Number of sections to instantiate',
+                        type=int,
+                        default=200000)
+    return parser.parse_args()
+
+
+def measure(section_class, count):
+    """
+    Instantiate a number of sections, the same way the map parser does
+
+    :return: A tuple with the elapsed time in seconds and the memory held by the sections in MB
+    """
+    ids = [f'symbol_{i}' for i in range(count)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    sections = [section_class(size=0x40, address=0x40080000 + i * 0x40, id=ids[i],
+                              _type='section', parent='.text')
+                for i in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del sections
+    return elapsed, current / (1024 * 1024)
+
+
+def run(count):
+    print(f"{count} sections")
+    print(f"{'class':<16}{'memory':>12}{'per section':>14}{'time':>10}")
+    for section_class in [LegacySection, Section]:
+        elapsed, memory = measure(section_class, count)
+        print(f"{section_class.__name__:<16}{memory:>9.1f} MB{memory * 1024 * 1024 / count:>12.0f} B"
+              f"{elapsed:>8.2f} s")
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    run(arguments.count)
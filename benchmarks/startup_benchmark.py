@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Startup time of the command line, measured with `python -X importtime`
+
+Executes LinkerScope in a fresh interpreter for each mode (help, `--convert` and rendering) and
+reports the time spent importing modules and the tracked modules imported: the modules of
+LinkerScope and a few heavy dependencies (see `WATCHED_MODULES`). Other modules, such as the
+standard library ones, differ between Python versions and installations, so they are not tracked.
+Results are compared with the ones tracked at `startup_baseline.json`, so cold start regressions
+become visible: new tracked modules imported by a mode, or import time growing beyond a tolerance.
+Execute from the repository root:
+
+    python benchmarks/startup_benchmark.py [--check] [--update]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from synthetic_map import generate
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+BASELINE_FILENAME = os.path.join(BENCHMARKS_DIRECTORY, 'startup_baseline.json')
+LINKERSCOPE = os.path.join(REPOSITORY_DIRECTORY, 'linkerscope.py')
+
+# Third party and standard library modules, with their submodules, that take a noticeable time to
+# import and should only be imported by the modes needing them
+WATCHED_MODULES = ('yaml', 'svgwrite', 'PIL', 'concurrent.futures', 'multiprocessing')
+
+
+def get_tracked_module(name):
+    """
+    Get the name a module is tracked by
+
+    :param name: Name of an imported module
+    :return: The name of the module if it belongs to LinkerScope, the watched module it belongs
+             to, or None if it is not tracked
+    """
+    for watched in WATCHED_MODULES:
+        if name == watched or name.startswith(watched + '.'):
+            return watched
+    top_level = name.split('.')[0]
+    if os.path.isfile(os.path.join(REPOSITORY_DIRECTORY, top_level + '.py')) or \
+            os.path.isfile(os.path.join(REPOSITORY_DIRECTORY, top_level, '__init__.py')):
+        return name
+    return None
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat',
+                        help='Number of executions of each mode. The fastest one is reported',
+                        type=int,
+                        default=5)
+    parser.add_argument('--tolerance',
+                        help='Allowed import time growth over the baseline, as a fraction',
+                        type=float,
+                        default=0.5)
+    parser.add_argument('--check',
+                        help='Exit with an error if any mode regressed',
+                        action='store_true',
+                        default=False)
+    parser.add_argument('--update',
+                        help='Save the results as the new baseline',
+                        action='store_true',
+                        default=False)
+    return parser.parse_args()
+
+
+def get_modes(directory):
+    """
+    Get the command line arguments of each measured mode
+    """
+    map_filename = os.path.join(directory, 'synthetic.map')
+    generate(map_filename, 64 * 1024)
+
+    examples = os.path.join(REPOSITORY_DIRECTORY, 'examples')
+    return {
+        'help': ['--help'],
+        'convert': [map_filename, '--convert', '--no-cache', '-o',
+                    os.path.join(directory, 'map.json')],
+        'render': [os.path.join(examples, 'stm32f103_map.yaml'),
+                   '-c', os.path.join(examples, 'stm32f103_config.yaml'),
+                   '-o', os.path.join(directory, 'map.svg')],
+    }
+
+
+def measure(arguments):
+    """
+    Execute LinkerScope once with import time tracing
+
+    :return: A tuple with the import time in ms, the wall time in ms and the tracked modules
+             imported (see `get_tracked_module()`)
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', LINKERSCOPE] + arguments,
+                            capture_output=True, text=True, check=False)
+    wall_time = (time.perf_counter() - start) * 1000
+
+    import_time = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Skip the header line
+        if not cumulative.strip().isdigit():
+            continue
+        module = get_tracked_module(name.strip())
+        if module is not None:
+            modules.append(module)
+        # Top level imports include the time of everything they import
+        if not name.startswith('  '):
+            import_time += int(cumulative) / 1000
+
+    return import_time, wall_time, sorted(set(modules))
+
+
+def run(repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, arguments in get_modes(directory).items():
+            measures = [measure(arguments) for _ in range(repeat)]
+            import_time = min(m[0] for m in measures)
+            wall_time = min(m[1] for m in measures)
+            results[mode] = {'import_ms': round(import_time, 1),
+                             'wall_ms': round(wall_time, 1),
+                             'modules': measures[0][2]}
+    return results
+
+
+def compare(results, baseline, tolerance) -> bool:
+    """
+    Print the results next to the baseline ones
+
+    :return: True if any mode imports new modules or got slower than the tolerance allows
+    """
+    regressed = False
+    print(f"{'mode':<10}{'import':>12}{'baseline':>12}{'wall':>12}{'modules':>10}")
+    for mode, result in results.items():
+        base = baseline.get(mode)
+        base_import = f"{base['import_ms']:.1f} ms" if base else '-'
+        print(f"{mode:<10}{result['import_ms']:>9.1f} ms{base_import:>12}"
+              f"{result['wall_ms']:>9.1f} ms{len(result['modules']):>10}")
+        if base is None:
+            continue
+
+        new_modules = sorted(set(result['modules']) - set(base['modules']))
+        if len(new_modules) > 0:
+            regressed = True
+            print(f"    new modules: {', '.join(new_modules)}")
+        if result['import_ms'] > base['import_ms'] * (1 + tolerance):
+            regressed = True
+            print(f"    import time grew more than {tolerance:.0%} over the baseline")
+
+    return regressed
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    results = run(arguments.repeat)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILENAME):
+        with open(BASELINE_FILENAME, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    regressed = compare(results, baseline, arguments.tolerance)
+
+    if arguments.update:
+        with open(BASELINE_FILENAME, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+
+    sys.exit(1 if arguments.check and regressed else 0)
@@ -0,0 +1,79 @@
+"""
+Generator of synthetic GNU linker map files, used by the benchmarks to get inputs of any size
+"""
+import random
+
+HEADER = """Archive member included to satisfy reference by file (symbol)
+
+libc.a(lib_a-memcpy.o)        main.o (memcpy)
+
+Memory Configuration
+
+Name             Origin             Length             Attributes
+iram0_0_seg      0x0000000040080000 0x0000000000020000 xr
+dram0_0_seg      0x000000003ffb0000 0x0000000000050000 rw
+*default*        0x0000000000000000 0xffffffffffffffff
+
+Linker script and memory map
+
+"""
+
+OUTPUT_SECTIONS = ['.text', '.rodata', '.data', '.bss']
+
+
+def _make_input_section(parent, index, address, rng):
+    """
+    Make the lines describing a single input section, its symbol and an eventual fill
+
+    :return: A tuple with the list of lines and the size occupied by the input section
+    """
+    size = rng.randrange(0x4, 0x400, 4)
+    obj = f'esp-idf/module{index % 97}/libmodule{index % 97}.a(file{index}.c.obj)'
+    lines = [f' {parent}.symbol_{index}\n',
+             f'                0x{address:016x} {hex(size):>10} {obj}\n',
+             f'                0x{address:016x}                symbol_{index}\n']
+
+    if index % 7 == 0:
+        lines.append(f' *fill*         0x{address + size:016x}        0x4 \n')
+        size += 4
+
+    return lines, size
+
+
+def generate(filename, target_size_bytes, seed=0):
+    """
+    Write a synthetic GNU linker map file
+
+    :param filename: Name of the map file to generate
+    :param target_size_bytes: Approximate size of the generated file
+    :param seed: Seed for the pseudo-random section sizes, so outputs are reproducible
+    :return: Number of input sections written to the file
+    """
+    rng = random.Random(seed)
+    address = 0x40080000
+    index = 0
+    per_area_bytes = target_size_bytes // len(OUTPUT_SECTIONS)
+
+    with open(filename, 'w', encoding='utf8') as file:
+        file.write(HEADER)
+
+        for parent in OUTPUT_SECTIONS:
+            area_start = address
+            body = []
+            body_size = 0
+
+            # Output section header carries the total size, so its body is generated first
+            while body_size < per_area_bytes:
+                lines, size = _make_input_section(parent, index, address, rng)
+                body.extend(lines)
+                body_size += sum(len(line) for line in lines)
+                address += size
+                index += 1
+
+            file.write(f'{parent:<16}0x{area_start:016x} {hex(address - area_start):>10}\n')
+            file.write(f' *({parent} {parent}.*)\n')
+            file.writelines(body)
+            file.write('\n')
+            address = (address + 0xFFFF) & ~0xFFFF
+
+    return index
@@ -0,0 +1,140 @@
+from area_view import AreaView
+from helpers import safe_element_list_get, safe_element_dict_get, DefaultAppValues
+from links import Links
+from logger import logger
+from section_rules import SectionRules
+from sections import Sections
+from style import Style
+
+
+class AreaConfiguration:
+    """
+    Configuration of a single area, with its style and section override rules already resolved
+    """
+    def __init__(self, area_config, style):
+        self.area_config = area_config
+        self.section_size = safe_element_dict_get(area_config, 'section-size', None)
+        self.memory_range = safe_element_dict_get(area_config, 'range', None)
+        self.style = style.derive(safe_element_dict_get(area_config, 'style', None))
+
+        inner_sections = safe_element_dict_get(area_config, 'sections', [])
+        if inner_sections is None:
+            logger.warning(
+                "'sections' property is declared but is empty. Field has been ignored")
+        self.rules = SectionRules(inner_sections)
+
+    def filter_sections(self, sections: Sections) -> Sections:
+        """
+        Select the sections shown by this area
+
+        :param sections: All the sections of the map
+        :return: Sections within the area memory range and section size limits
+        """
+        return (sections
+                .filter_address_range(safe_element_list_get(self.memory_range, 0),
+                                      safe_element_list_get(self.memory_range, 1))
+                .filter_size_min(safe_element_list_get(self.section_size, 0))
+                .filter_size_max(safe_element_list_get(self.section_size, 1))
+                )
+
+    def make_area_view(self, sections: Sections) -> AreaView:
+        """
+        Build the view of this area
+
+        :param sections: Sections shown by the area
+        :return: Area view
+        """
+        return AreaView(
+            sections=sections,
+            area_config=self.area_config,
+            style=self.style,
+            rules=self.rules
+        )
+
+
+class Configuration:
+    """
+    Diagram configuration, with styles, links and area rules resolved only once
+
+    A configuration can be reused to draw any number of maps, so the work of interpreting the
+    configuration file is not repeated for every diagram
+    """
+    def __init__(self, configuration=None):
+        """
+        :param configuration: Configuration object, as loaded from a configuration file. If not
+                              provided, default style and properties will be used
+        """
+        self.configuration = configuration
+        self.style = Style.get_default()
+        self.links = None
+        self.size = DefaultAppValues.DOCUMENT_SIZE
+        self.areas = []
+        self.default_area = AreaConfiguration([], self.style)
+
+        if configuration is None:
+            return
+
+        # Links style derives from the default style, not from the document one
+        yaml_links = safe_element_dict_get(configuration, 'links', None)
+        links_style = self.style.derive(safe_element_dict_get(yaml_links, 'style', None))
+        self.style = self.style.derive(safe_element_dict_get(configuration, 'style', None))
+
+        self.links = Links(yaml_links, style=links_style)
+        self.size = safe_element_dict_get(configuration, 'size', DefaultAppValues.DOCUMENT_SIZE)
+
+        self.default_area = AreaConfiguration([], self.style)
+        self.areas = [AreaConfiguration(safe_element_dict_get(area_element, 'area'), self.style)
+                      for area_element in safe_element_dict_get(configuration, 'areas', []) or []]
+
+    @staticmethod
+    def from_file(filename):
+        """
+        Load a configuration file
+
+        :param filename: Name of the configuration file
+        :return: Configuration object, with default values if the file has no content
+        """
+        # PyYAML is only imported when needed, as configurations may be given as objects
+        from yaml_io import load_yaml  # pylint: disable=import-outside-toplevel
+
+        with open(filename, 'r', encoding='utf-8') as file:
+            configuration = load_yaml(file)
+
+        return Configuration(configuration if configuration is not None else {})
+
+    def get_area_views(self, sections: Sections, cache=None) -> [AreaView]:
+        """
+        Get the area view/s with the configured style and properties (if any)
+
+        If areas are configured, one area view is produced for each of them, with the sections it
+        selects. Otherwise, only one area view will be generated with the default style and
+        properties
+
+        :param sections: Sections to be selected from and displayed. Only the drawn types of
+                         sections are selected (see `Sections.get_drawn()`)
+        :param cache: Optional, object providing already built area views through
+                      `get_area_view(area, sections)`, instead of building them again
+        :return: A list of configured area views
+        """
+        sections = sections.get_drawn()
+
+        def make_area_view(area, area_sections):
+            if cache is not None:
+                return cache.get_area_view(area, area_sections)
+            return area.make_area_view(area_sections)
+
+        if len(self.areas) == 0:
+            return [make_area_view(self.default_area, sections)]
+
+        area_views = []
+        for i, area in enumerate(self.areas):
+            filtered_sections = area.filter_sections(sections)
+            if len(filtered_sections.get_sections()) == 0:
+                logger.warning(f"Filter for area view with index {i} doesn't result in any"
+                               f"section. Try re-adjusting memory range, size, ... This area "
+                               f"will be omitted")
+                continue
+
+            area_views.append(make_area_view(area, filtered_sections))
+
+        return area_views
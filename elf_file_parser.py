@@ -0,0 +1,223 @@
+import re
+import struct
+import sys
+
+from logger import logger
+from map_parser import MapParser
+from section import Section
+
+ELF_MAGIC = b'\x7fELF'
+
+# Layouts of the ELF header, section headers, program headers and symbols, for 32 and 64 bit
+# files (`EI_CLASS`), without their byte order
+ELF_CLASSES = {
+    1: {
+        'header': '16sHHIIIIIHHHHHH',
+        'section': 'IIIIIIIIII',
+        'segment': 'IIIIIIII',
+        'symbol': 'IIIBBH',
+    },
+    2: {
+        'header': '16sHHIQQQIHHHHHH',
+        'section': 'IIQQQQIIQQ',
+        'segment': 'IIQQQQQQ',
+        'symbol': 'IBBHQQ',
+    },
+}
+# Byte order of each `EI_DATA` value
+ELF_BYTE_ORDERS = {1: '<', 2: '>'}
+
+SHT_SYMTAB = 2
+SHT_NOBITS = 8
+SHT_DYNSYM = 11
+SHF_ALLOC = 0x2
+SHN_UNDEF = 0
+SHN_LORESERVE = 0xff00
+SHN_ABS = 0xfff1
+SHN_XINDEX = 0xffff
+PT_LOAD = 1
+STT_FUNC = 2
+STT_SECTION = 3
+STT_FILE = 4
+EM_ARM = 40
+
+# Mapping symbols, which mark the start of code or data at ARM, AArch64 and RISC-V files
+MAPPING_SYMBOL_PATTERN = re.compile(r'\$[atdx](?:\..*)?$')
+
+
+class ELFFileParser(MapParser):
+    """
+    Read the sections and symbols of an ELF file, 32 or 64 bit and of any byte order, such as the
+    `.elf` or `.axf` file of a firmware
+
+    Only the section header, program header and symbol tables are read, unpacked with `struct`
+    from a memory mapping of the file. Allocated sections are read as areas, with their load
+    address taken from the loadable segment holding them, and defined symbols as symbols, with
+    the section holding them as parent and, for local symbols, the source file they come from as
+    origin. Code symbol addresses of ARM files are given without their Thumb bit. ELF files keep
+    no memory regions nor input sections
+    """
+    VERSION = 1
+
+    @staticmethod
+    def sniff(header: bytes) -> bool:
+        return header.startswith(ELF_MAGIC)
+
+    def _read_parts(self, file):
+        # Tables are spread over the whole file, so it can't be read in parts
+        data = file.read()
+        return [(data, 0, len(data))]
+
+    def _error(self, message):
+        logger.error(f"'{self.input_filename}' is not a valid ELF file: {message}")
+        sys.exit(-1)
+
+    def _iter_buffer_sections(self, parts):
+        # Memory mapped ELF files are never copied, only the tables read from them are
+        for buffer, _, _ in parts:
+            try:
+                yield from self._iter_elf_sections(buffer)
+            except (struct.error, IndexError):
+                self._error("its tables are truncated")
+
+    def _iter_elf_sections(self, data):
+        """
+        Read the sections and symbols of an ELF file
+
+        :param data: Bytes of the whole ELF file, or its memory mapping
+        :return: A generator of `Section` objects
+        """
+        if data[:4] != ELF_MAGIC or len(data) < 16 or data[4] not in ELF_CLASSES or \
+                data[5] not in ELF_BYTE_ORDERS:
+            self._error("unknown identification bytes")
+
+        byte_order = ELF_BYTE_ORDERS[data[5]]
+        formats = {name: struct.Struct(byte_order + layout)
+                   for name, layout in ELF_CLASSES[data[4]].items()}
+
+        _, _, machine, _, _, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum, shstrndx = \
+            formats['header'].unpack_from(data, 0)
+
+        if shoff == 0:
+            self._error("it has no section header table")
+
+        section_format = formats['section']
+        # Files with many sections keep their number and the index of the section names at the
+        # first section header
+        first = section_format.unpack_from(data, shoff)
+        if shnum == 0:
+            shnum = first[5]
+        if shstrndx == SHN_XINDEX:
+            shstrndx = first[6]
+
+        headers = [section_format.unpack_from(data, shoff + i * shentsize) for i in range(shnum)]
+
+        _, _, _, _, names_offset, names_size, _, _, _, _ = headers[shstrndx]
+        section_names = data[names_offset:names_offset + names_size]
+
+        # Virtual address, physical (load) address and size in memory of the loadable segments
+        segments = []
+        for i in range(phnum if phoff else 0):
+            segment = formats['segment'].unpack_from(data, phoff + i * phentsize)
+            if segment[0] == PT_LOAD:
+                segments.append(segment[2:4] + segment[5:6] if data[4] == 1 else
+                                segment[3:5] + segment[6:7])
+
+        # Allocated sections, by index, as areas
+        areas = {}
+        for i, (name, _type, flags, address, _, size, _, _, _, _) in enumerate(headers):
+            if i == 0 or not flags & SHF_ALLOC:
+                continue
+            area = Section(parent=None,
+                           id=get_string(section_names, name),
+                           address=address,
+                           size=size,
+                           _type='area',
+                           lma=None if _type == SHT_NOBITS else
+                           self._get_load_address(segments, address)
+                           )
+            areas[i] = area
+            yield area
+
+        symbol_tables = [header for header in headers if header[1] == SHT_SYMTAB] or \
+            [header for header in headers if header[1] == SHT_DYNSYM]
+        for _, _, _, _, offset, size, link, first_global, _, _ in symbol_tables[:1]:
+            _, _, _, _, strings_offset, strings_size, _, _, _, _ = headers[link]
+            yield from self._iter_symbols(data[offset:offset + size],
+                                          formats['symbol'],
+                                          data[strings_offset:strings_offset + strings_size],
+                                          areas,
+                                          first_global,
+                                          machine == EM_ARM,
+                                          is_64=data[4] == 2)
+
+    @staticmethod
+    def _get_load_address(segments, address):
+        """
+        Get the load address of an address, from the loadable segment holding it, or None if it
+        is loaded where it is
+        """
+        for vaddr, paddr, memsz in segments:
+            if vaddr <= address < vaddr + memsz:
+                return None if paddr == vaddr else paddr + address - vaddr
+        return None
+
+    @staticmethod
+    def _iter_symbols(table, symbol_format, strings, areas, first_global, thumb, is_64):
+        """
+        Read the defined symbols of a symbol table
+
+        :param table: Bytes of the symbol table
+        :param symbol_format: `struct.Struct` of the symbols
+        :param strings: Bytes of the string table with the symbol names
+        :param areas: Areas of the allocated sections, by their index
+        :param first_global: Index of the first global symbol, after all local ones
+        :param thumb: Whether code symbol addresses have the Thumb bit set
+        :param is_64: Whether the symbols are of a 64 bit file, whose fields have another order
+        :return: A generator of `Section` objects
+        """
+        table = table[:len(table) - len(table) % symbol_format.size]
+        origin = None
+        for i, fields in enumerate(symbol_format.iter_unpack(table)):
+            if is_64:
+                name, info, _, index, address, size = fields
+            else:
+                name, address, size, info, _, index = fields
+
+            _type = info & 0xf
+            if _type == STT_FILE:
+                origin = get_string(strings, name)
+                continue
+            if _type == STT_SECTION or index == SHN_UNDEF or \
+                    (index >= SHN_LORESERVE and index != SHN_ABS):
+                continue
+
+            area = areas.get(index)
+            if area is None and index != SHN_ABS:
+                # Symbols of sections that are not loaded, such as debug information ones
+                continue
+
+            symbol_name = get_string(strings, name)
+            # Mapping symbols are as many as functions at some files, so they are told apart from
+            # their first character before using a regular expression
+            if not symbol_name or \
+                    (symbol_name[0] == '$' and MAPPING_SYMBOL_PATTERN.match(symbol_name)):
+                continue
+
+            if thumb and _type == STT_FUNC:
+                address &= ~1
+            yield Section(parent=None if area is None else area.id,
+                          id=symbol_name,
+                          address=address,
+                          size=size,
+                          _type='symbol',
+                          origin=origin if i < first_global else None
+                          )
+
+
+def get_string(strings: bytes, offset: int) -> str:
+    """
+    Get a string of an ELF string table, ended by a null character
+    """
+    end = strings.find(b'\0', offset)
+    return strings[offset:end if end != -1 else len(strings)].decode('utf8', errors='replace')
@@ -1,81 +1,332 @@
+import mmap
+import os
 import re
-import yaml
 
+from map_parser import MapParser, RELEASE_SIZE
 from section import Section
 
+_HEX = rb'0x([0-9a-fA-F]+)'
 
-class GNULinkerMapParser:
+# Every line of interest of a map file, in a single pattern so the map file is searched only once.
+# Lines are searched from the line end before them, which is way faster than matching line starts
+# with `^`, and names of 15 characters or more are written alone at their own line, with the rest
+# of their line at the next one
+RECORD_PATTERN = re.compile(
+    rb'\n(?:'
+    # Headers of the parts of the map file
+    rb'(Archive member included[^\r\n]*|Allocating common symbols|Discarded input sections|'
+    rb'Memory Configuration|Linker script and memory map)'
+    # Output sections, and memory regions at the memory configuration, at the first column:
+    # `.data           0x20000000       0x10 load address 0x08001234`
+    rb'|([^\s*]\S*)(?:\r?\n)?[ \t]+' + _HEX + rb'[ \t]+' + _HEX +
+    rb'(?:[ \t]+load address ' + _HEX + rb')?'
+    # Input sections and fills, at the second column:
+    # ` .text.main     0x08000100       0x1c libapp.a(main.o)` or ` *fill*         0x0800011c        0x4`
+    rb'| (\*fill\*|[^\s*]\S*)(?:\r?\n)?[ \t]+' + _HEX + rb'[ \t]+' + _HEX +
+    rb'(?:[ \t]+([^\r\n]*\S))?'
+    # Symbols and linker script assignments: `                0x08000100                main`
+    rb'|[ \t]+' + _HEX + rb'[ \t]+(?!0x)([^\s(][^\r\n]*)'
+    # Any other line starting at the first or second column, such as `LOAD main.o`
+    rb'| ?[^\s*]'
+    rb')')
+
+# Lines that can start a part of a map file to be parsed on its own: any line starting at the
+# first or second column, which is never the second line of an output or input section
+PART_START_PATTERN = re.compile(rb'\n ?[^\s*]')
+
+# Linker script assignments, such as `_sdata = .` or `PROVIDE (end = .)`, listed as symbols
+ASSIGNMENT_PATTERN = re.compile(
+    rb'(?:(?:PROVIDE|PROVIDE_HIDDEN|HIDDEN) \(([^\s=]+)|([^\s=]+)) [-+*/%&|<>]*= ')
+
+# Only entries at the memory configuration, as memory regions, and at the memory map are parsed
+MEMORY_HEADER = b'Memory Configuration'
+BODY_HEADER = b'Linker script and memory map'
+HEADERS = (b'Archive member included', b'Allocating common symbols', b'Discarded input sections',
+           MEMORY_HEADER, BODY_HEADER)
+
+# Map files smaller than this, per worker process, are not worth parsing in parallel
+MIN_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of distinct object names kept to be shared by the sections coming from them
+MAX_ORIGINS = 64 * 1024
+
+
+class GNULinkerMapParser(MapParser):
     """
-    Parse a GNU linker map file and convert it to a yaml file for further processing
+    Parse a GNU linker map file into a list of sections for further processing
+
+    The whole map model is parsed in a single pass: memory regions from the memory configuration
+    table, and output sections (areas), input sections, fills and symbols from the memory map,
+    together with the load address of sections loaded elsewhere and the object or archive member
+    input sections and symbols come from. Input sections, fills and symbols have their output
+    section as parent. Symbols have no size at map files, so they are given the one up to the next
+    symbol, or to the end of their input section. Addresses can have any number of digits, so
+    maps of both 32 and 64 bit targets are parsed. Discarded input sections are left out
+
+    Big map files can be parsed in parallel (see `parse()`)
     """
-    def __init__(self, input_filename, output_filename):
-        self.sections = []
-        self.subsections = []
-        self.input_filename = input_filename
-        self.output_filename = output_filename
-
-    def parse(self):
-        with open(self.input_filename, 'r', encoding='utf8') as file:
-
-            file_iterator = iter(file)
-            prev_line = next(file_iterator)
-            for line in file_iterator:
-                self.process_areas(prev_line)
-                multiple_line = prev_line + line
-                self.process_sections(multiple_line)
-                prev_line = line
-
-        my_dict = {'map': []}
-        for section in self.sections:
-            my_dict['map'].append({
-                'type': 'area',
-                'address': section.address,
-                'size': section.size,
-                'id': section.id,
-                'flags': section.flags
-            })
-
-        for subsection in self.subsections:
-            my_dict['map'].append({
-                'type': 'section',
-                'parent': subsection.parent,
-                'address': subsection.address,
-                'size': subsection.size,
-                'id': subsection.id,
-                'flags': subsection.flags
-            })
-
-        with open(self.output_filename, 'w', encoding='utf8') as file:
-            yaml_string = yaml.dump(my_dict)
-            file.write(yaml_string)
-
-    def process_areas(self, line):
-        pattern = r'([.][a-z]{1,})[ ]{1,}(0x[a-fA-F0-9]{1,})[ ]{1,}(0x[a-fA-F0-9]{1,})\n'
-
-        p = re.compile(pattern)
-        result = p.search(line)
-
-        if result is not None:
-            self.sections.append(Section(parent=None,
-                                         id=result.group(1),
-                                         address=int(result.group(2), 0),
-                                         size=int(result.group(3), 0),
-                                         _type='area'
-                                         )
-                                 )
-
-    def process_sections(self, line):
-        pattern = r'\s(.[^.]+).([^. \n]+)[\n\r]\s+(0x[0-9a-fA-F]{16})\s+' \
-                  r'(0x[0-9a-fA-F]+)\s+[^\n]+[\n\r]{1}'
-
-        p = re.compile(pattern)
-        result = p.search(line)
-
-        if result is not None:
-            self.subsections.append(Section(parent=result.group(1),
-                                            id=result.group(2),
-                                            address=int(result.group(3), 0),
-                                            size=int(result.group(4), 0),
-                                            _type='section'
+    VERSION = 2
+
+    PART_START_PATTERN = PART_START_PATTERN
+
+    @staticmethod
+    def sniff(header: bytes) -> bool:
+        return any(part_header in header for part_header in HEADERS)
+
+    @staticmethod
+    def _get_load_address(area, address):
+        """
+        Get the load address of an address within an area, or None if it is loaded where it is
+        """
+        return None if area is None or area.lma is None else area.lma + address - area.address
+
+    @staticmethod
+    def _close_symbols(symbols, end):
+        """
+        Set the size of symbols sharing the same address, up to a given end address
+        """
+        for symbol in symbols:
+            symbol.size = max(end - symbol.address, 0)
+        return symbols
+
+    def _iter_buffer_sections(self, parts):
+        """
+        Parse the entries of a map file from its bytes, usually memory mapped
+
+        :param parts: Iterable over consecutive parts of the map file, as (buffer, start, end)
+                      tuples, with the offsets of the part at the buffer
+        :return: A generator of `Section` objects
+        """
+        body = True
+        memory = False
+        area = None
+        # Input section whose symbols are listed after it, and last symbols found, whose size is
+        # only known once the next symbol or the end of the input section is found
+        input_section = None
+        symbols = []
+        origins = {}
+
+        for buffer, start, end in parts:
+            can_release = self._can_release(buffer)
+            released = start - start % mmap.PAGESIZE
+
+            for record in RECORD_PATTERN.finditer(buffer, start, end):
+                header, area_name, area_address, area_size, area_lma, name, address, size, \
+                    origin, symbol_address, symbol_name = record.groups()
+
+                if can_release and record.start() - released > RELEASE_SIZE:
+                    released = self._release_parsed(buffer, released, record.start())
+
+                if symbol_address is not None:
+                    if not body:
+                        continue
+                    symbol_address = int(symbol_address, 16)
+
+                    # Assignments are told apart from symbols without a regular expression first
+                    assignment = ASSIGNMENT_PATTERN.match(symbol_name) \
+                        if b'= ' in symbol_name else None
+                    if assignment is not None:
+                        # Symbols defined by the linker script don't belong to any input section
+                        if symbols:
+                            yield from self._close_symbols(
+                                symbols, input_section.address + input_section.size)
+                            symbols = []
+                        input_section = None
+                        symbol_name = assignment.group(1) or assignment.group(2)
+                        if symbol_name == b'.':
+                            continue
+
+                    elif symbols and symbols[0].address != symbol_address:
+                        yield from self._close_symbols(
+                            symbols,
+                            symbol_address if symbol_address > symbols[0].address else
+                            input_section.address + input_section.size)
+                        symbols = []
+
+                    symbol = Section(parent=None if area is None else area.id,
+                                     id=symbol_name.rstrip().decode('utf8'),
+                                     address=symbol_address,
+                                     size=0,
+                                     _type='symbol',
+                                     origin=None if input_section is None else input_section.origin
+                                     )
+                    if input_section is None:
+                        yield symbol
+                    else:
+                        symbols.append(symbol)
+                    continue
+
+                # Any other line ends the list of symbols of the last input section
+                if symbols:
+                    yield from self._close_symbols(symbols,
+                                                   input_section.address + input_section.size)
+                    symbols = []
+                input_section = None
+
+                if name is not None:
+                    if not body:
+                        continue
+                    address = int(address, 16)
+                    if name == b'*fill*':
+                        yield Section(parent=None if area is None else area.id,
+                                      id='*fill*',
+                                      address=address,
+                                      size=int(size, 16),
+                                      _type='fill'
+                                      )
+                        continue
+
+                    if origin is not None:
+                        # Objects hold many sections, so their names are shared by all of them
+                        if origin not in origins:
+                            if len(origins) >= MAX_ORIGINS:
+                                origins.clear()
+                            origins[origin] = origin.decode('utf8')
+                        origin = origins[origin]
+                    input_section = Section(parent=None if area is None else area.id,
+                                            id=self.get_section_id(name.decode('utf8')),
+                                            address=address,
+                                            size=int(size, 16),
+                                            _type='section',
+                                            lma=self._get_load_address(area, address),
+                                            origin=origin
                                             )
-                                    )
+                    yield input_section
+
+                elif area_name is not None:
+                    if memory:
+                        yield Section(parent=None,
+                                      id=area_name.decode('utf8'),
+                                      address=int(area_address, 16),
+                                      size=int(area_size, 16),
+                                      _type='region'
+                                      )
+                    elif body:
+                        address = int(area_address, 16)
+                        lma = None if area_lma is None else int(area_lma, 16)
+                        area = Section(parent=None,
+                                       id=area_name.decode('utf8'),
+                                       address=address,
+                                       size=int(area_size, 16),
+                                       _type='area',
+                                       lma=None if lma == address else lma
+                                       )
+                        yield area
+
+                elif header is not None:
+                    body = header == BODY_HEADER
+                    memory = header == MEMORY_HEADER
+
+        if symbols:
+            yield from self._close_symbols(symbols, input_section.address + input_section.size)
+
+    def parse(self, jobs=1) -> [Section]:
+        """
+        Parse the whole map file
+
+        :param jobs: Number of worker processes parsing the map file. Big map files are split in
+                     chunks parsed in parallel (see `get_chunks()`), with the same results as
+                     when parsed by a single process
+        :return: A list with all the memory regions and areas found at the map file, followed by
+                 all its input sections, fills and symbols
+        """
+        # The standard input can't be split in chunks, so it is always parsed by a single process
+        chunks = self.get_chunks(jobs) if jobs > 1 and self.input_filename != '-' else []
+
+        if len(chunks) <= 1:
+            return super().parse()
+
+        # Worker processes are only loaded when needed, as serial parsing, such as the one of
+        # --convert, doesn't use them
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+        from helpers import get_process_context
+
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=get_process_context()) as executor:
+            results = executor.map(self.parse_chunk,
+                                   [self.input_filename] * len(chunks),
+                                   [start for start, _ in chunks],
+                                   [end for _, end in chunks])
+            # Chunks are merged in file order, so sections keep the order of a serial parse
+            return self._store(self._merge_chunks(results))
+
+    def _merge_chunks(self, results):
+        """
+        Build the sections parsed by each chunk, in order
+
+        Entries at the start of a chunk, before its first area, belong to the last area of the
+        previous chunks, which their worker didn't know about, so it is set here
+
+        :param results: Results of `parse_chunk()` for each chunk, in file order
+        :return: A generator of `Section` objects
+        """
+        area = None
+        for leading, records in results:
+            for i, (_type, parent, _id, address, size, lma, origin) in enumerate(records):
+                if i < leading and area is not None:
+                    parent = area.id
+                    if _type == 'section':
+                        lma = self._get_load_address(area, address)
+
+                section = Section(parent=parent, id=_id, address=address, size=size,
+                                  _type=_type, lma=lma, origin=origin)
+                if _type == 'area':
+                    area = section
+                yield section
+
+    def get_chunks(self, jobs) -> [tuple]:
+        """
+        Split the map file in chunks to be parsed in parallel
+
+        Chunks start at lines that can start a part of the map file on its own (see
+        `PART_START_PATTERN`), so that no output or input section is split between two chunks,
+        and the first chunk holds all the headers of the map file, up to its memory map
+
+        :param jobs: Number of worker processes that will parse the chunks
+        :return: List of (start, end) offsets of each chunk at the file
+        """
+        size = os.path.getsize(self.input_filename)
+        # Some more chunks than workers, so workers that finish earlier can take another one
+        count = min(jobs * 4, size // MIN_CHUNK_SIZE)
+        if count <= 1:
+            return [(0, size)]
+
+        with open(self.input_filename, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            body_start = max(mapped.find(header) for header in HEADERS)
+
+            boundaries = [0]
+            for i in range(1, count):
+                target = max(size * i // count, boundaries[-1], body_start)
+                boundary = PART_START_PATTERN.search(mapped, target, size * (i + 1) // count)
+                if boundary is not None:
+                    boundaries.append(boundary.start() + 1)
+            boundaries.append(size)
+
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    @staticmethod
+    def parse_chunk(filename, start, end) -> tuple:
+        """
+        Parse a chunk of a map file, at a worker process
+
+        The chunk is searched at a memory mapping of the file, so workers only read their chunk
+
+        :param filename: Name of the map file
+        :param start: Offset of the first line of the chunk
+        :param end: Offset of the first line after the chunk
+        :return: A tuple with the number of entries found before the first area of the chunk, and
+                 a list of (type, parent, id, address, size, lma, origin) tuples of all the
+                 entries found, cheaper to send back to the main process than `Section` objects
+        """
+        with open(filename, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Lines are searched from the line end before them
+            records = [(section.type, section.parent, section.id, section.address, section.size,
+                        section.lma, section.origin)
+                       for section in GNULinkerMapParser(filename)._iter_buffer_sections(
+                           [(mapped, max(start - 1, 0), end)])]
+
+        leading = next((i for i, record in enumerate(records) if record[0] == 'area'),
+                       len(records))
+        return leading, records
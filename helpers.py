@@ -8,6 +8,10 @@ class DefaultAppValues:
     SIZE_X = 200
     SIZE_Y = 500
     TITLE = ''
+    # Sections shorter than this, in pixels, are merged with their small neighbours. 0 merges none
+    MERGE_MIN_SIZE = 0
+    # Maximum distance, in pixels, between two small sections to be merged
+    MERGE_MAX_GAP = 1
 
 def safe_element_list_get(_list: [], index: int, default=None) -> int:
     """
@@ -32,4 +36,15 @@ def safe_element_dict_get(_dict: {}, key: str, default=None) -> int:
     :return: The expected element if exists, None if it doesn't
     """
 
-    return _dict[key] if _dict is not None and key in _dict else default
\ No newline at end of file
+    return _dict[key] if _dict is not None and key in _dict else default
+
+def get_process_context():
+    """
+    Get the start method for worker processes. Fork lets workers inherit already loaded data
+    without pickling it
+    """
+    import multiprocessing  # pylint: disable=import-outside-toplevel
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
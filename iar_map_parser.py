@@ -0,0 +1,162 @@
+import mmap
+import re
+
+from map_parser import MapParser, RELEASE_SIZE
+from section import Section
+
+# Addresses and sizes may have their digits grouped by `'`, such as `0x2000'0000`
+_HEX = rb"0x([0-9a-fA-F']+)"
+
+# Every line of interest of a map file, in a single pattern so the map file is searched only once.
+# Names too long for their column are written alone at their own line, with the rest of their
+# line at the next one
+RECORD_PATTERN = re.compile(
+    rb'\n(?:'
+    # Headers of the parts of the map file: `*** PLACEMENT SUMMARY`
+    rb'\*\*\* ([A-Z][^\r\n]*)'
+    # Placement directives with an address range, as memory regions:
+    # `"P1":  place in [from 0x800'0000 to 0x80f'ffff] { ro };`
+    rb'|"([^"]+)": +place in \[from ' + _HEX + rb' to ' + _HEX + rb'\]'
+    # Placement directives at the placement summary, as areas, with their size:
+    # `"P2", part 1 of 2:                            0x10`
+    rb'|"([^"]+)"(, part [0-9]+ of [0-9]+)?: +' + _HEX +
+    # End of the placement directive, with its end address and size: `  - 0x2000'0010    0x10`
+    rb'| +- ' + _HEX + rb' +' + _HEX +
+    # Sections of the placement directive, with their kind, if any:
+    # `  .text              ro code   0x800'0188   0x3a4  main.o [1]`
+    rb'| +(\S+(?: \S+)*?)(?:\r?\n)? +(?:[a-z]+(?: [a-z]+)? +)?' + _HEX + rb' +' + _HEX +
+    rb' +([^\r\n]*\S)'
+    # Code and data symbols of the entry list:
+    # `main                     0x800'0189   0x30  Code  Gb  main.o [1]`
+    rb'|(\S+)(?:\r?\n)? +' + _HEX + rb' +(?:' + _HEX + rb' +)?(Code|Data) +\S+ +([^\r\n]*\S)'
+    # Any other line starting at the first column, such as `Unused ranges:`
+    rb'|\S'
+    rb')')
+
+# Index of the library or directory objects come from, such as `main.o [1]`
+OBJECT_INDEX_PATTERN = re.compile(r'\s*\[[0-9]+\]$')
+
+# Objects of blocks listed before the sections they hold, which are left out
+BLOCK_OBJECTS = (b'<Block>', b'<Init block>')
+
+PLACEMENT_HEADER = b'PLACEMENT SUMMARY'
+ENTRY_LIST_HEADER = b'ENTRY LIST'
+
+
+def get_int(value: bytes) -> int:
+    return int(value.replace(b"'", b''), 16)
+
+
+class IARMapParser(MapParser):
+    """
+    Parse an IAR ILINK map file (`--map`) into a list of sections for further processing
+
+    Placement directives placing in an address range are parsed as memory regions, and the ones
+    at the placement summary, or each of their parts, as areas, with the sections placed by them,
+    and the object they come from as origin. Blocks are left out, but not the sections they hold.
+    Code and data symbols are parsed from the entry list with their address, without the Thumb bit
+    of code, and size, if given. IAR map files have no load addresses, as initialized data is
+    copied from its own initializer bytes section, and the entry list is listed after the
+    placement summary with no relation to it, so symbols have no parent
+    """
+    # Any line starting at the first column, which is never the second line of a section or symbol
+    PART_START_PATTERN = re.compile(rb'\n\S')
+
+    @staticmethod
+    def sniff(header: bytes) -> bool:
+        return b'IAR ELF Linker' in header
+
+    @staticmethod
+    def _close_area(area, sections, end=None):
+        """
+        Set the address of an area, from the end address at its last line, or from its first
+        section if it has none, and get it with its sections, or nothing if its address is unknown
+        """
+        if end is not None:
+            area.address = end - area.size
+        elif sections:
+            area.address = sections[0].address
+        else:
+            return []
+        return [area] + sections
+
+    def _iter_buffer_sections(self, parts):
+        placement = False
+        entries = False
+        # Area being parsed, with its sections, only yielded once its address is known
+        area = None
+        sections = []
+
+        for buffer, start, end in parts:
+            can_release = self._can_release(buffer)
+            released = start - start % mmap.PAGESIZE
+
+            for record in RECORD_PATTERN.finditer(buffer, start, end):
+                header, region_name, region_start, region_end, area_name, area_part, area_size, \
+                    area_end, _, name, address, size, origin, \
+                    symbol_name, symbol_address, symbol_size, symbol_type, symbol_origin = \
+                    record.groups()
+
+                if can_release and record.start() - released > RELEASE_SIZE:
+                    released = self._release_parsed(buffer, released, record.start())
+
+                if name is not None:
+                    if area is None or origin in BLOCK_OBJECTS:
+                        continue
+                    sections.append(Section(parent=area.id,
+                                            id=self.get_section_id(name.decode('utf8')),
+                                            address=get_int(address),
+                                            size=get_int(size),
+                                            _type='section',
+                                            origin=OBJECT_INDEX_PATTERN.sub(
+                                                '', origin.decode('utf8'))
+                                            ))
+                    continue
+
+                if symbol_name is not None:
+                    if not entries:
+                        continue
+                    symbol_address = get_int(symbol_address)
+                    if symbol_type == b'Code':
+                        symbol_address &= ~1
+                    yield Section(parent=None,
+                                  id=symbol_name.decode('utf8'),
+                                  address=symbol_address,
+                                  size=0 if symbol_size is None else get_int(symbol_size),
+                                  _type='symbol',
+                                  origin=OBJECT_INDEX_PATTERN.sub('', symbol_origin.decode('utf8'))
+                                  )
+                    continue
+
+                # Any other line ends the area being parsed
+                if area is not None:
+                    yield from self._close_area(
+                        area, sections, None if area_end is None else get_int(area_end))
+                    area = None
+                    sections = []
+
+                if area_name is not None:
+                    if placement:
+                        area = Section(parent=None,
+                                       id=(area_name + (area_part or b'')).decode('utf8'),
+                                       address=0,
+                                       size=get_int(area_size),
+                                       _type='area'
+                                       )
+
+                elif region_name is not None:
+                    if placement:
+                        region_start = get_int(region_start)
+                        yield Section(parent=None,
+                                      id=region_name.decode('utf8'),
+                                      address=region_start,
+                                      size=get_int(region_end) - region_start + 1,
+                                      _type='region'
+                                      )
+
+                elif header is not None:
+                    placement = header.startswith(PLACEMENT_HEADER)
+                    entries = header.startswith(ENTRY_LIST_HEADER)
+
+        if area is not None:
+            yield from self._close_area(area, sections)
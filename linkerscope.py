@@ -1,146 +1,376 @@
 #!/usr/bin/env python3
 
 import argparse
-import copy
+import logging
+import os
+import sys
 
-import yaml
-
-from area_view import AreaView
-from helpers import safe_element_list_get, safe_element_dict_get, DefaultAppValues
-from links import Links
-from logger import logger
-from map_render import MapRender
-from style import Style
-from map_file_loader import MapFileLoader
+from logger import logger, configure_logger
 from sections import Sections
 
+# Parsing, configuration and rendering modules are imported only when needed, so that runs not
+# drawing any diagram, such as `--convert`, start faster
+# pylint: disable=import-outside-toplevel
+
 
 def parse_arguments():
     parser = argparse.ArgumentParser()
     parser.add_argument('input',
+                        nargs='?',
                         help='Name of the map file,'
-                             'can be either linker .map files or .yaml descriptor')
+                             'can be either linker .map files, .elf / .axf ELF files or .yaml / '
+                             '.json descriptor. Use - to read a linker .map or ELF file from the '
+                             'standard input')
     parser.add_argument('--output',
                         '-o',
-                        help='Name for the generated .svg file',
+                        help='Name for the generated .svg file, or for the generated .yaml / .json '
+                             'file when used together with --convert',
                         default='map.svg')
     parser.add_argument('--convert',
-                        help='Performs the conversion of a .map file to .yaml if a .map file was passed without any additional step',
+                        help='Performs the conversion of a .map file to .yaml if a .map file was passed without any additional step. '
+                             'The .yaml file is saved as map.yaml unless a .yaml or .json --output is given',
+                        action='store_true',
+                        default=False,
+                        required=False
+                        )
+    parser.add_argument('--no-cache',
+                        help='Always parse .map files, instead of reusing sections cached from a '
+                             'previous run with the same .map file',
+                        action='store_true',
+                        default=False,
+                        required=False
+                        )
+    parser.add_argument('--css-styles',
+                        help='Declare each distinct style only once, as a CSS class at the '
+                             'generated .svg file, instead of repeating it at every element',
                         action='store_true',
                         default=False,
                         required=False
                         )
+    parser.add_argument('--fast',
+                        help='Skip the validation of the generated SVG elements, which takes most '
+                             'of the drawing time of big maps',
+                        action='store_true',
+                        default=False,
+                        required=False
+                        )
+    parser.add_argument('--scale',
+                        help='Scale of raster (.png) outputs, such as 0.25 for thumbnails',
+                        type=float,
+                        default=1.0,
+                        required=False
+                        )
     parser.add_argument('--config',
                         '-c',
                         help='Configuration file (.yml). If not specified,'
                              'will use config.yaml as default',
                         )
+    parser.add_argument('--batch',
+                        help='Manifest file (.yaml) with a list of jobs, each one with its input, '
+                             'config and output files. Each distinct input file is parsed only '
+                             'once, and jobs are rendered in parallel',
+                        )
+    parser.add_argument('--jobs',
+                        '-j',
+                        help='Number of worker processes drawing the areas of the diagram, '
+                             'or the jobs of a --batch manifest. Defaults to 1, or to the number '
+                             'of CPUs with --batch',
+                        type=int,
+                        default=None
+                        )
+    parser.add_argument('--diff',
+                        help='Map file of a base build to compare the input map file with. Both '
+                             'maps are drawn side by side, with added, removed, grown and shrunk '
+                             'sections styled differently',
+                        metavar='BASE',
+                        )
+    parser.add_argument('--diff-report',
+                        help='Save the differences between the --diff base map and the input map '
+                             'as a .json report',
+                        )
+    parser.add_argument('--report',
+                        help='Save the size and occupancy report of the areas of the configuration, '
+                             'and of the memory regions of the map, as a .json or .csv file, or '
+                             'print it as .json with -, instead of drawing any diagram. Exits '
+                             'with an error code if any budget of the configuration is exceeded',
+                        )
+    parser.add_argument('--top',
+                        help='Number of biggest sections and symbols of each area listed by '
+                             '--report. Defaults to 10',
+                        type=int,
+                        default=10
+                        )
+    parser.add_argument('--watch',
+                        help='Keep watching the input and configuration files, and draw the '
+                             'diagram again every time any of them changes',
+                        action='store_true',
+                        default=False,
+                        required=False
+                        )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('--verbose',
+                           '-v',
+                           help='Show debug messages',
+                           action='store_const',
+                           dest='log_level',
+                           const=logging.DEBUG,
+                           default=logging.INFO
+                           )
+    verbosity.add_argument('--quiet',
+                           '-q',
+                           help='Only show error messages',
+                           action='store_const',
+                           dest='log_level',
+                           const=logging.ERROR
+                           )
 
     return parser.parse_args()
 
 
-def get_area_views(_raw_sections, _base_style, config=None):
+def load_map(map_source, use_cache=True, jobs=1) -> Sections:
+    """
+    Load the sections of a map, so they can be drawn any number of times
+
+    :param map_source: Name of a .map, .elf, .axf, .yaml or .json map file, a list of sections
+                       or an already loaded map
+    :param use_cache: Whether to reuse the sections cached from a previous parsing of a .map file
+    :param jobs: Number of worker processes parsing a .map file
+    :return: Loaded map, as a Sections object
+    """
+    if isinstance(map_source, Sections):
+        return map_source
+    if isinstance(map_source, list):
+        return Sections(sections=map_source)
+
+    from map_file_loader import MapFileLoader
+
+    return Sections(sections=MapFileLoader(os.fspath(map_source),
+                                           False,
+                                           use_cache=use_cache,
+                                           jobs=jobs).parse())
+
+
+def load_config(config) -> 'Configuration':
+    """
+    Load a diagram configuration, so it can be used to draw any number of maps
+
+    :param config: Name of a configuration file, a configuration object as loaded from a
+                   configuration file, or an already loaded configuration. If None, default style
+                   and properties will be used
+    :return: Loaded configuration
+    """
+    from configuration import Configuration
+
+    if isinstance(config, Configuration):
+        return config
+    if config is None or isinstance(config, dict):
+        return Configuration(config)
+
+    return Configuration.from_file(os.fspath(config))
+
+
+def render(map_source, config=None, output='map.svg', css_styles=False, use_cache=True,
+           area_view_cache=None, fast=False, scale=1.0, jobs=1):
+    """
+    Draw the memory map diagram of a map to a .svg or .png file
+
+    Both the map and the configuration can be given already loaded (see `load_map` and
+    `load_config`), so drawing several diagrams within the same process only loads them once
+
+    :param map_source: Name of a .map, .elf, .axf, .yaml or .json map file, a list of sections
+                       or an already loaded map
+    :param config: Name of a configuration file, a configuration object or an already loaded
+                   configuration. If None, default style and properties will be used
+    :param output: Name of the file to generate. Its extension, .svg or .png, selects the format
+    :param css_styles: Whether to declare styles as CSS classes instead of element attributes
+    :param use_cache: Whether to reuse the sections cached from a previous parsing of a .map file
+    :param area_view_cache: Optional, cache of area views built by previous drawings
+    :param fast: Skip the validation of the generated SVG elements
+    :param scale: Scale of raster outputs
+    :param jobs: Number of worker processes parsing the map and drawing the areas of the
+                 diagram. The output is the same for any number of them
+    """
+    from map_render import MapRender
+
+    sections = load_map(map_source, use_cache=use_cache, jobs=jobs)
+    configuration = load_config(config)
+
+    MapRender(area_view=configuration.get_area_views(sections, cache=area_view_cache),
+              links=configuration.links,
+              style=configuration.style,
+              file=output,
+              size=configuration.size,
+              css_styles=css_styles,
+              validate=not fast,
+              scale=scale,
+              jobs=jobs
+              ).draw()
+
+
+def render_diff(base_source, head_source, config=None, output='diff.svg', report=None,
+                css_styles=False, use_cache=True, fast=False, scale=1.0, jobs=1) -> 'MapDiff':
+    """
+    Draw the memory map diagrams of two maps side by side, such as the ones of the base and head
+    builds of a change, with the sections that changed styled after their kind of change
+
+    :param base_source: Name of the base map file, a list of sections or an already loaded map
+    :param head_source: Name of the head map file, a list of sections or an already loaded map
+    :param config: Name of a configuration file, a configuration object or an already loaded
+                   configuration, used for the diagrams of both maps
+    :param output: Name of the file to generate. Its extension, .svg or .png, selects the format
+    :param report: Optional, name of a .json file to save the differences between both maps to
+    :param css_styles: Whether to declare styles as CSS classes instead of element attributes
+    :param use_cache: Whether to reuse the sections cached from a previous parsing of a .map file
+    :param fast: Skip the validation of the generated SVG elements
+    :param scale: Scale of raster outputs
+    :param jobs: Number of worker processes parsing the maps and drawing the areas of the diagram
+    :return: Differences between both maps
+    """
+    from map_diff import MapDiff
+    from map_render import MapRender
+
+    def get_name(source):
+        if not isinstance(source, (str, os.PathLike)) or os.fspath(source) == '-':
+            return None
+        return os.path.basename(os.fspath(source))
+
+    diff = MapDiff(load_map(base_source, use_cache=use_cache, jobs=jobs),
+                   load_map(head_source, use_cache=use_cache, jobs=jobs),
+                   base_name=get_name(base_source) or 'base',
+                   head_name=get_name(head_source) or 'head')
+    if report is not None:
+        diff.write_report(report)
+
+    configuration = load_config(config)
+
+    # Links refer to sections by their id, which are found at both maps, so they are not drawn
+    MapRender(area_view=diff.get_area_views(configuration),
+              links=None,
+              style=configuration.style,
+              file=output,
+              size=diff.get_size(configuration),
+              css_styles=css_styles,
+              validate=not fast,
+              scale=scale,
+              jobs=jobs
+              ).draw()
+
+    return diff
+
+
+def report(map_source, config=None, output=None, top=10, use_cache=True, jobs=1) -> 'MapReport':
     """
-    Get the area view/s with the specified style and properties (if any)
-
-    Given a list of sections, base style and configuration, this function produce a series of
-    area views with specific properties and styles. If a configuration object is passed, it will
-    be used to retrieve additional configured style and properties for one or more area views.
-    If no configuration is passed, only one area view will be generated with the default style
-    and properties
-
-    :param _raw_sections: A list of unprocessed sections to be selected from and displayed
-    :param _base_style: Base / default style to build child styles from
-    :param config: Optional, configuration object indicating number of areas, style, properties,...
-    :return: A list of configured area views
+    Get the size and occupancy report of a map, without drawing any diagram
+
+    :param map_source: Name of a .map, .elf, .axf, .yaml or .json map file, a list of sections
+                       or an already loaded map
+    :param config: Name of a configuration file, a configuration object or an already loaded
+                   configuration, with the areas to report and their budgets
+    :param output: Optional, name of the .json or .csv file to save the report to, or `-` to
+                   print it to the standard output
+    :param top: Number of biggest sections and symbols reported for each area
+    :param use_cache: Whether to reuse the sections cached from a previous parsing of a .map file
+    :param jobs: Number of worker processes parsing a .map file
+    :return: Report, whose budgets can be checked with `check_budgets()`
     """
-    def get_default_area_view(sections, style):
-        """
-        Get an area view configured with default parameters
-        :param sections: A list of unprocessed sections to be selected from and displayed
-        :param style: Base / default style to build child styles from
-        :return: List of one element corresponding to a default area view
-        """
-        return [AreaView(
-            sections=(Sections(sections=sections)),
-            style=copy.deepcopy(style)
-        )]
-
-    def get_custom_area_views(sections, style):
-        """
-        Get a list of area views configured according to passed parameters
-
-        :param sections: A list of unprocessed sections to be selected from and displayed
-        :param style: Base / default style to build child styles from
-        :return: List of one or various custom area views
-        """
-        area_views = []
-        for i, area_element in enumerate(area_configurations):
-            area_config = safe_element_dict_get(area_element, 'area')
-            section_size = safe_element_dict_get(area_config, 'section-size', None)
-            memory_range = safe_element_dict_get(area_config, 'range', None)
-            area_style = copy.deepcopy(style)
-            filtered_sections = (Sections(sections=copy.deepcopy(sections))
-                                 .filter_address_min(safe_element_list_get(memory_range, 0))
-                                 .filter_address_max(safe_element_list_get(memory_range, 1))
-                                 .filter_size_min(safe_element_list_get(section_size, 0))
-                                 .filter_size_max(safe_element_list_get(section_size, 1))
-                                 )
-            if len(filtered_sections.get_sections()) == 0:
-                logger.warning(f"Filter for area view with index {i} doesn't result in any"
-                               f"section. Try re-adjusting memory range, size, ... This area "
-                               f"will be omitted")
-                continue
-
-            area_views.append(
-                AreaView(
-                    sections=filtered_sections,
-                    area_config=area_config,
-                    style=area_style.override_properties_from(
-                        Style(style=safe_element_dict_get(area_config, 'style', None)))
-                )
-            )
-
-        return area_views
-
-    area_configurations = safe_element_dict_get(config, 'areas', []) or []
-
-    if len(area_configurations) == 0:
-        return get_default_area_view(_raw_sections, _base_style)
-    else:
-        return get_custom_area_views(_raw_sections, _base_style)
-
-
-arguments = parse_arguments()
-raw_sections = MapFileLoader(arguments.input, arguments.convert).parse()
-base_style = Style().get_default()
-
-
-links = None
-document_size = DefaultAppValues.DOCUMENT_SIZE
-configuration = {}
-
-# Apply custom configuration if configuration file is available
-if arguments.config:
-    with open(arguments.config, 'r', encoding='utf-8') as file:
-        configuration = yaml.safe_load(file)
-        if configuration is None:
-            configuration = {}
-
-    base_style_cpy = copy.deepcopy(base_style)
-    style_config = safe_element_dict_get(configuration, 'style', None)
-    base_style.override_properties_from(Style(style=style_config))
-    yaml_links = safe_element_dict_get(configuration, 'links', None)
-    links_style = base_style_cpy.override_properties_from(
-        Style(style=safe_element_dict_get(yaml_links,
-                                          'style', None)))
-
-    links = Links(yaml_links, style=links_style)
-    document_size = safe_element_dict_get(configuration, 'size', DefaultAppValues.DOCUMENT_SIZE)
-
-MapRender(area_view=get_area_views(raw_sections, base_style, configuration),
-          links=links,
-          style=base_style,
-          file=arguments.output,
-          size=document_size
-          ).draw()
+    from map_report import MapReport
+
+    map_report = MapReport(load_map(map_source, use_cache=use_cache, jobs=jobs),
+                           load_config(config),
+                           top=top)
+    if output is not None:
+        map_report.write(output)
+
+    return map_report
+
+
+def main():
+    arguments = parse_arguments()
+    configure_logger(arguments.log_level)
+    render_options = {'css_styles': arguments.css_styles, 'fast': arguments.fast,
+                      'scale': arguments.scale}
+
+    if arguments.batch:
+        from batch import run_batch
+        sys.exit(run_batch(arguments.batch,
+                           workers=arguments.jobs,
+                           use_cache=not arguments.no_cache,
+                           **render_options))
+
+    if arguments.input is None:
+        logger.error("An input file is required, unless --batch is used")
+        sys.exit(-1)
+
+    render_options['jobs'] = arguments.jobs or 1
+
+    if arguments.report is not None:
+        if arguments.convert or arguments.watch or arguments.diff is not None:
+            logger.error("--report flag can't be used together with --convert, --watch nor "
+                         "--diff")
+            sys.exit(-1)
+
+        map_report = report(arguments.input,
+                            arguments.config,
+                            arguments.report,
+                            top=arguments.top,
+                            use_cache=not arguments.no_cache,
+                            jobs=render_options['jobs'])
+        map_report.log_summary()
+        exceeded = map_report.check_budgets()
+        for message in exceeded:
+            logger.error(f"Budget exceeded: {message}")
+        sys.exit(1 if exceeded else 0)
+
+    if arguments.diff_report is not None and arguments.diff is None:
+        logger.error("--diff-report flag requires a --diff base map")
+        sys.exit(-1)
+
+    if arguments.diff is not None:
+        if arguments.convert or arguments.watch:
+            logger.error("--diff flag can't be used together with --convert nor --watch")
+            sys.exit(-1)
+        if arguments.diff == '-' and arguments.input == '-':
+            logger.error("Only one of the maps compared by --diff can be read from the standard "
+                         "input")
+            sys.exit(-1)
+
+        render_diff(arguments.diff,
+                    arguments.input,
+                    arguments.config,
+                    arguments.output,
+                    report=arguments.diff_report,
+                    use_cache=not arguments.no_cache,
+                    **render_options)
+        return
+
+    if arguments.watch:
+        if arguments.convert:
+            logger.error("--watch flag can't be used together with --convert")
+            sys.exit(-1)
+        if arguments.input == '-':
+            logger.error("--watch flag requires an input file, not the standard input")
+            sys.exit(-1)
+
+        from watch import Watcher
+        Watcher(arguments.input,
+                arguments.config,
+                arguments.output,
+                use_cache=not arguments.no_cache,
+                **render_options).run()
+        return
+
+    from map_file_loader import MapFileLoader
+
+    convert_output = arguments.output if arguments.output.endswith(('.yaml', '.yml', '.json')) \
+        else 'map.yaml'
+    raw_sections = MapFileLoader(arguments.input,
+                                 arguments.convert,
+                                 convert_output,
+                                 use_cache=not arguments.no_cache,
+                                 jobs=arguments.jobs).parse()
+
+    render(raw_sections, arguments.config, arguments.output, **render_options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import mmap
+import re
+
+from map_parser import MapParser, RELEASE_SIZE
+from section import Section
+
+# Header of the table of the map file, such as
+# `     VMA      LMA     Size Align Out     In      Symbol`, or without the LMA column for older
+# versions of LLVM lld
+HEADER_PATTERN = re.compile(rb'\s*(?:(VMA\s+LMA)|Address)\s+Size\s+Align\s+Out\s+In\s+Symbol')
+
+# Table rows, with hexadecimal VMA, LMA and size, decimal alignment and the name indented by its
+# level: output sections have none, input sections 8 spaces and symbols 16
+ROW_PATTERN = re.compile(
+    rb'\n *([0-9a-fA-F]+) +([0-9a-fA-F]+) +([0-9a-fA-F]+) +[0-9]+ ( *)([^\r\n]+)')
+# Same rows for map files without the LMA column
+ROW_WITHOUT_LMA_PATTERN = re.compile(
+    rb'\n *([0-9a-fA-F]+)() +([0-9a-fA-F]+) +[0-9]+ ( *)([^\r\n]+)')
+
+# Linker script assignments, such as `_etext = .` or `PROVIDE(end = .)`
+ASSIGNMENT_PATTERN = re.compile(
+    rb'(?:(?:PROVIDE|PROVIDE_HIDDEN|HIDDEN)\s*\(\s*([^\s=()]+)|([^\s=]+))\s*[-+*/%&|<>]*=')
+
+INPUT_SECTION_INDENT = 8
+SYMBOL_INDENT = 16
+
+
+class LLDMapParser(MapParser):
+    """
+    Parse a LLVM lld map file (`-Map`) into a list of sections for further processing
+
+    lld map files are a single table, with a row for each output section, input section, symbol
+    and linker script assignment, and columns for their address (VMA), load address (LMA), size
+    and alignment. Input sections, written as `object:(name)`, and symbols have their output
+    section as parent and the object or archive member they come from as origin. lld writes no
+    symbol sizes, so, as for GNU map files, each symbol extends up to the next symbol or the end
+    of its input section. Linker script assignments are listed as symbols of unknown size, 0.
+    lld map files have no memory regions
+    """
+    VERSION = 2
+
+    @staticmethod
+    def sniff(header: bytes) -> bool:
+        return HEADER_PATTERN.match(header) is not None
+
+    @staticmethod
+    def _close_symbols(symbols, end):
+        """
+        Set the size of symbols sharing the same address, up to a given end address
+        """
+        for symbol in symbols:
+            symbol.size = max(end - symbol.address, 0)
+        return symbols
+
+    def _iter_buffer_sections(self, parts):
+        area = None
+        # Input section whose symbols are listed after it, and last symbols found, whose size is
+        # only known once the next symbol or the end of the input section is found
+        input_section = None
+        symbols = []
+        row_pattern = None
+
+        for buffer, start, end in parts:
+            if row_pattern is None:
+                header = HEADER_PATTERN.match(buffer, start)
+                row_pattern = ROW_PATTERN if header is not None and header.group(1) is not None \
+                    else ROW_WITHOUT_LMA_PATTERN
+
+            can_release = self._can_release(buffer)
+            released = start - start % mmap.PAGESIZE
+
+            for row in row_pattern.finditer(buffer, start, end):
+                if can_release and row.start() - released > RELEASE_SIZE:
+                    released = self._release_parsed(buffer, released, row.start())
+
+                address, lma, size, indent, name = row.groups()
+                address = int(address, 16)
+                lma = int(lma, 16) if lma else address
+                lma = None if lma == address else lma
+                name = name.rstrip()
+
+                is_symbol = len(indent) >= SYMBOL_INDENT and b'=' not in name
+                if symbols and (not is_symbol or symbols[0].address != address):
+                    # Any other row ends the symbols of the last input section
+                    yield from self._close_symbols(
+                        symbols,
+                        address if is_symbol and address > symbols[0].address else
+                        input_section.address + input_section.size)
+                    symbols = []
+
+                if b'=' in name:
+                    assignment = ASSIGNMENT_PATTERN.match(name)
+                    if assignment is None:
+                        continue
+                    name = assignment.group(1) or assignment.group(2)
+                    if len(indent) < INPUT_SECTION_INDENT:
+                        # Assignments between output sections end the last one
+                        area = None
+                    input_section = None
+                    if name != b'.':
+                        yield Section(parent=None if area is None else area.id,
+                                      id=name.decode('utf8'),
+                                      address=address,
+                                      size=0,
+                                      _type='symbol'
+                                      )
+                    continue
+
+                if is_symbol:
+                    symbol = Section(parent=None if area is None else area.id,
+                                     id=name.decode('utf8'),
+                                     address=address,
+                                     size=0,
+                                     _type='symbol',
+                                     origin=None if input_section is None else input_section.origin
+                                     )
+                    if input_section is None:
+                        yield symbol
+                    else:
+                        symbols.append(symbol)
+
+                elif len(indent) >= INPUT_SECTION_INDENT:
+                    # Input sections are written as `object:(name)`, other rows, such as `BYTE`
+                    # commands, are skipped
+                    separator = name.rfind(b':(')
+                    if separator == -1 or not name.endswith(b')'):
+                        input_section = None
+                        continue
+                    input_section = Section(parent=None if area is None else area.id,
+                                            id=self.get_section_id(
+                                                name[separator + 2:-1].decode('utf8')),
+                                            address=address,
+                                            size=int(size, 16),
+                                            _type='section',
+                                            lma=lma,
+                                            origin=name[:separator].decode('utf8')
+                                            )
+                    yield input_section
+
+                else:
+                    input_section = None
+                    area = Section(parent=None,
+                                   id=name.decode('utf8'),
+                                   address=address,
+                                   size=int(size, 16),
+                                   _type='area',
+                                   lma=lma
+                                   )
+                    yield area
+
+        if symbols:
+            yield from self._close_symbols(symbols, input_section.address + input_section.size)
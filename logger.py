@@ -19,15 +19,35 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format + reset
     }
 
+    def __init__(self):
+        super().__init__()
+        self.formatters = {level: logging.Formatter(log_fmt)
+                           for level, log_fmt in self.FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self.formatters.get(record.levelno)
+        if formatter is None:
+            formatter = logging.Formatter(self.FORMATS[logging.DEBUG])
         return formatter.format(record)
 
 
-logger = logging.getLogger()
-logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler()
-handler.setLevel(logging.DEBUG)
-handler.setFormatter(CustomFormatter())
-logger.addHandler(handler)
+# No handler is installed at import, so importing LinkerScope as a library doesn't alter logging
+# of the application. The command line installs its own handler through `configure_logger`
+logger = logging.getLogger('linkerscope')
+
+
+def configure_logger(level=logging.INFO):
+    """
+    Install the colored console handler and set the level of messages to show
+
+    :param level: Minimum level of the messages to show. Lower level messages are discarded
+                  before being formatted
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(CustomFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
@@ -0,0 +1,151 @@
+import hashlib
+import marshal
+import os
+import tempfile
+import time
+
+from logger import logger
+from section import Section
+
+
+class MapCache:
+    """
+    On-disk cache of parsed map files
+
+    Entries are keyed by the content hash of the map file and the version of the parser that
+    produced them, so a modified map file or an updated parser never hits a stale entry.
+    Sections are stored in a compact binary form, and the least recently used entries are evicted
+    whenever the cache grows above its maximum size
+    """
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+    EXTENSION = '.sections'
+    FORMAT_VERSION = 3
+    # Temporary files older than this, in seconds, were left by a run that crashed while storing
+    # an entry, instead of being written by a concurrent run
+    STALE_TEMPORARY_AGE = 60 * 60
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory if directory is not None else self.get_default_directory()
+        self.max_size = max_size
+
+    @staticmethod
+    def get_default_directory():
+        """
+        Get the default cache directory, following the XDG base directory specification
+        :return: Path to the cache directory
+        """
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'linkerscope')
+
+    @staticmethod
+    def get_key(filename, parser_version):
+        """
+        Compute the cache key for a given map file
+
+        :param filename: Map file to compute the key for
+        :param parser_version: Version of the parser used to parse the map file
+        :return: Cache key, as an hexadecimal string
+        """
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest.update(f'parser-{parser_version}'.encode())
+        return digest.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + self.EXTENSION)
+
+    def load(self, key):
+        """
+        Get the sections stored under a given key
+
+        :param key: Cache key of the map file
+        :return: List of sections if the key is cached, None otherwise
+        """
+        path = self._get_path(key)
+
+        try:
+            with open(path, 'rb') as file:
+                version, records = marshal.loads(file.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError):
+            logger.warning(f"Cache entry '{path}' is corrupted and will be discarded")
+            self._remove(path)
+            return None
+
+        if version != self.FORMAT_VERSION:
+            self._remove(path)
+            return None
+
+        # Refresh access time so this entry is the last one to be evicted. A concurrent run may
+        # have evicted it since it was read, but the sections read are still valid
+        try:
+            os.utime(path)
+        except OSError as error:
+            logger.debug(f"Access time of cache entry '{path}' could not be refreshed: {error}")
+
+        return [Section(_type=_type, parent=parent, id=_id, address=address, size=size,
+                        name=name, flags=flag_bits, lma=lma, origin=origin)
+                for _type, parent, _id, address, size, name, flag_bits, lma, origin in records]
+
+    def store(self, key, sections):
+        """
+        Store a list of sections under a given key
+
+        :param key: Cache key of the map file
+        :param sections: Sections to store
+        """
+        records = [(section.type, section.parent, section.id, section.address, section.size,
+                    section.name, section.flag_bits, section.lma, section.origin)
+                   for section in sections]
+
+        temporary_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first, so concurrent runs never read a partial entry
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(marshal.dumps((self.FORMAT_VERSION, records)))
+            os.replace(temporary_path, self._get_path(key))
+        except OSError as error:
+            logger.warning(f"Parsed map could not be cached: {error}")
+            if temporary_path is not None:
+                self._remove(temporary_path)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits its maximum size, and the
+        temporary files left by runs that crashed while storing an entry
+        """
+        stale_time = time.time() - self.STALE_TEMPORARY_AGE
+        entries = []
+        for entry in os.scandir(self.directory):
+            # Entries may be removed by a concurrent run at any time, and are then skipped
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith(self.EXTENSION):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            elif entry.name.startswith(tempfile.gettempprefix()) and stat.st_mtime < stale_time:
+                self._remove(entry.path)
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,270 @@
+import json
+from collections import Counter
+from operator import attrgetter
+
+from configuration import AreaConfiguration, Configuration
+from helpers import safe_element_dict_get, safe_element_list_get, DefaultAppValues
+from logger import logger
+from section import Section
+from sections import Sections
+from style import Style
+
+# Style of the sections of each kind of change, applied over the style of their area. Can be
+# overridden at the `diff-styles` property of the configuration file
+DIFF_STYLES = {
+    'added': {'fill': '#a6dba0'},
+    'removed': {'fill': '#f4a582'},
+    'grown': {'fill': '#fdd863'},
+    'shrunk': {'fill': '#92c5de'},
+}
+
+# Kinds of change, in the order they are reported
+STATUSES = ('added', 'removed', 'grown', 'shrunk', 'moved', 'unchanged')
+
+# Properties sections of both maps are matched by
+_get_key = attrgetter('type', 'parent', 'id', 'origin')
+
+
+class SectionChange:
+    """
+    Change of a single section between two maps
+
+    `base` is None for sections only found at the head map, and `head` for the ones only found at
+    the base map
+    """
+    __slots__ = ('status', 'base', 'head')
+
+    def __init__(self, base: Section = None, head: Section = None):
+        self.base = base
+        self.head = head
+        if base is None:
+            self.status = 'added'
+        elif head is None:
+            self.status = 'removed'
+        elif head.size != base.size:
+            self.status = 'grown' if head.size > base.size else 'shrunk'
+        elif head.address != base.address:
+            self.status = 'moved'
+        else:
+            self.status = 'unchanged'
+
+    @property
+    def section(self) -> Section:
+        return self.base if self.head is None else self.head
+
+    @property
+    def size_delta(self) -> int:
+        return (0 if self.head is None else self.head.size) - \
+            (0 if self.base is None else self.base.size)
+
+    @property
+    def address_delta(self):
+        if self.base is None or self.head is None:
+            return None
+        return self.head.address - self.base.address
+
+    def to_dict(self) -> {}:
+        section = self.section
+        return {
+            'status': self.status,
+            'type': section.type,
+            'id': section.id,
+            'parent': section.parent,
+            'origin': section.origin,
+            'base-address': None if self.base is None else self.base.address,
+            'head-address': None if self.head is None else self.head.address,
+            'address-delta': self.address_delta,
+            'base-size': None if self.base is None else self.base.size,
+            'head-size': None if self.head is None else self.head.size,
+            'size-delta': self.size_delta,
+        }
+
+
+class MapDiff:
+    """
+    Differences between the sections of two maps, such as the ones of the base and head builds
+    of a change
+
+    Sections are matched by their type, parent, id and origin with a hash join: sections of the
+    base map are indexed in a dictionary, where each section of the head map is looked up, so
+    matching takes linear time even for maps with hundreds of thousands of symbols. Sections
+    sharing all of them, such as the `.text` sections of objects without origin, are matched in
+    the order they appear at each map
+    """
+    def __init__(self, base: Sections, head: Sections, base_name='base', head_name='head'):
+        self.base = base
+        self.head = head
+        self.base_name = base_name
+        self.head_name = head_name
+        self.changes = self._match(base.get_sections(), head.get_sections())
+
+    @staticmethod
+    def _get_keys(sections: [Section]) -> []:
+        """
+        Get the keys sections are matched by, numbering the occurrences of repeated ones
+        """
+        keys = list(map(_get_key, sections))
+
+        repeated = {key for key, count in Counter(keys).items() if count > 1}
+        if repeated:
+            occurrences = {}
+            for i, key in enumerate(keys):
+                if key in repeated:
+                    occurrence = occurrences.get(key, 0)
+                    occurrences[key] = occurrence + 1
+                    keys[i] = key + (occurrence,)
+
+        return keys
+
+    def _match(self, base_sections: [Section], head_sections: [Section]) -> [SectionChange]:
+        """
+        Match the sections of both maps
+
+        :return: Changes of the sections of the head map, in their order, followed by the ones of
+                 the sections only found at the base map, in their order
+        """
+        base_by_key = dict(zip(self._get_keys(base_sections), base_sections))
+
+        pop = base_by_key.pop
+        changes = [SectionChange(pop(key, None), section)
+                   for key, section in zip(self._get_keys(head_sections), head_sections)]
+        # Sections left at the index were not found at the head map
+        changes.extend(SectionChange(base=section) for section in base_by_key.values())
+
+        return changes
+
+    def get_summary(self) -> {}:
+        """
+        Get the number of changes of each kind and the total size of both maps, for each type of
+        section
+        """
+        summary = {}
+        for change in self.changes:
+            section = change.section
+            totals = summary.get(section.type)
+            if totals is None:
+                totals = summary[section.type] = {**{status: 0 for status in STATUSES},
+                                                  'base-size': 0, 'head-size': 0, 'size-delta': 0}
+            totals[change.status] += 1
+            if change.base is not None:
+                totals['base-size'] += change.base.size
+            if change.head is not None:
+                totals['head-size'] += change.head.size
+            totals['size-delta'] += change.size_delta
+        return summary
+
+    def get_report(self) -> {}:
+        """
+        Get the differences between both maps as a machine readable report
+
+        :return: Dictionary with the names of both maps, the summary of changes for each type of
+                 section (see `get_summary()`), and every changed section, biggest size changes
+                 first
+        """
+        changes = sorted((change for change in self.changes if change.status != 'unchanged'),
+                         key=lambda change: -abs(change.size_delta))
+        return {
+            'base': self.base_name,
+            'head': self.head_name,
+            'summary': self.get_summary(),
+            'changes': [change.to_dict() for change in changes],
+        }
+
+    def write_report(self, filename):
+        """
+        Save the differences between both maps as a .json report (see `get_report()`)
+
+        :param filename: Name of the .json file to write
+        """
+        with open(filename, 'w', encoding='utf8') as file:
+            json.dump(self.get_report(), file, separators=(',', ':'))
+
+    def get_styled_sections(self, styles=None) -> (Sections, Sections):
+        """
+        Get the drawn sections of both maps, with the ones that changed styled after their kind
+        of change. Added sections are only found at the head map and removed ones at the base
+        map, while grown and shrunk ones are styled at both, and named with their size change at
+        the head map
+
+        :param styles: Style of the sections of each kind of change. Defaults to `DIFF_STYLES`
+        :return: Tuple with the sections of the base map and the ones of the head map
+        """
+        styles = {status: Style.intern({key.replace('-', '_'): value
+                                        for key, value in style.items()})
+                  for status, style in (styles or DIFF_STYLES).items() if style}
+
+        base_sections = []
+        head_sections = []
+        # Changes of the drawn sections of the base map, by section
+        base_changes = {}
+        for change in self.changes:
+            if change.section.type in Section.NOT_DRAWN_TYPES:
+                continue
+            if change.base is not None:
+                base_changes[id(change.base)] = change
+            if change.head is not None:
+                head_section = self._get_styled_section(change.head, styles.get(change.status))
+                if change.status in ('grown', 'shrunk'):
+                    head_section.name = \
+                        f"{change.head.name or change.head.id} ({change.size_delta:+})"
+                head_sections.append(head_section)
+
+        # Sections of the base map are kept in their original order
+        for section in self.base.get_sections():
+            change = base_changes.get(id(section))
+            if change is not None:
+                base_sections.append(self._get_styled_section(section, styles.get(change.status)))
+
+        return Sections(base_sections), Sections(head_sections)
+
+    @staticmethod
+    def _get_styled_section(section: Section, style: Style) -> Section:
+        view = section.view()
+        if style is not None:
+            view.style = style
+        return view
+
+    def get_area_views(self, configuration: Configuration) -> []:
+        """
+        Get the area views of both maps, side by side: the configured areas, or the default one,
+        are drawn for the base map and again, to their right, for the head map, with the same
+        configuration. Their titles are followed by the name of their map
+
+        :param configuration: Diagram configuration
+        :return: List of area views, the ones of the base map first
+        """
+        styles = safe_element_dict_get(configuration.configuration, 'diff-styles', None)
+        base_sections, head_sections = self.get_styled_sections(
+            None if styles is None else {**DIFF_STYLES, **styles})
+
+        areas = [area.area_config for area in configuration.areas] or [None]
+        offset = configuration.size[0]
+
+        area_views = []
+        for name, sections, offset_x in ((self.base_name, base_sections, 0),
+                                         (self.head_name, head_sections, offset)):
+            for i, area_config in enumerate(areas):
+                area_config = dict(area_config or {})
+                position = safe_element_dict_get(area_config, 'pos', None)
+                area_config['pos'] = [
+                    safe_element_list_get(position, 0, DefaultAppValues.POSITION_X) + offset_x,
+                    safe_element_list_get(position, 1, DefaultAppValues.POSITION_Y)]
+                title = safe_element_dict_get(area_config, 'title', DefaultAppValues.TITLE)
+                area_config['title'] = f"{title} ({name})" if title else name
+
+                area = AreaConfiguration(area_config, configuration.style)
+                filtered_sections = area.filter_sections(sections)
+                if len(filtered_sections.get_sections()) == 0:
+                    logger.warning(f"Filter for area view with index {i} doesn't result in any "
+                                   f"section of '{name}'. This area will be omitted")
+                    continue
+                area_views.append(area.make_area_view(filtered_sections))
+
+        return area_views
+
+    @staticmethod
+    def get_size(configuration: Configuration) -> (int, int):
+        """
+        Get the size of the document holding the area views of both maps side by side
+        """
+        return configuration.size[0] * 2, configuration.size[1]
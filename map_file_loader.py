@@ -1,60 +1,232 @@
+import json
 import os
 import sys
-import yaml
 from logger import logger
+from map_cache import MapCache
 from section import Section
+from armlink_map_parser import ArmlinkMapParser
+from elf_file_parser import ELFFileParser
 from gnu_linker_map_parser import GNULinkerMapParser
+from iar_map_parser import IARMapParser
+from lld_map_parser import LLDMapParser
+
+# Parsers of each map file format, the first one recognizing a map file parses it (see
+# `MapParser.sniff()`). Map files recognized by none of them are parsed as GNU linker map files
+MAP_PARSERS = [ELFFileParser, GNULinkerMapParser, LLDMapParser, ArmlinkMapParser, IARMapParser]
+
+# Extensions of ELF files, whose sections and symbols are read as the ones of .map files
+ELF_EXTENSIONS = ('.elf', '.axf')
+
+# Number of bytes at the start of a map file its format is recognized from
+SNIFF_SIZE = 4096
+
+
+def register_map_parser(parser_class):
+    """
+    Add the parser of a map file format to the ones map files are parsed with
+
+    :param parser_class: `MapParser` subclass, implementing `sniff()` and `_iter_buffer_sections()`
+    :return: The parser class, so this can be used as a class decorator
+    """
+    if parser_class not in MAP_PARSERS:
+        MAP_PARSERS.append(parser_class)
+    return parser_class
 
 
 class MapFileLoader:
     """
     Takes input file provided by user and loads it in memory for further processing.
-    Depending on the type of file (.map or .yaml) will include an additional conversion step and
-    create a temporary .yaml file
+    Depending on the type of file (.map, .elf, .axf, .yaml or .json), sections are either parsed
+    from the linker map file, with the parser of its format (see `get_map_parser()`), read from the
+    ELF file, or loaded from the .yaml / .json file. When requested, parsed .map files are
+    exported to a .yaml or .json file. Parsed .map files are cached, so rendering the same map
+    again skips its parsing
     """
-    def __init__(self, file, convert):
+    def __init__(self, file, convert, convert_output='map.yaml', use_cache=True, jobs=1):
         self.input_filename = file
+        self.jobs = jobs or 1
         self.convert = convert
+        self.convert_output = convert_output
+        self.cache = MapCache() if use_cache else None
 
     def parse(self):
         _, file_extension = os.path.splitext(self.input_filename)
 
-        if file_extension == '.map':
-            self.parse_map(self.input_filename)
+        if file_extension == '.map' or file_extension in ELF_EXTENSIONS or \
+                self.input_filename == '-':
+            sections = self.parse_map(self.input_filename, self.cache, self.jobs)
             if self.convert:
-                logger.info(".map file converted and saved as map.yaml")
+                if self.convert_output.endswith('.json'):
+                    self.export_json(sections, self.convert_output)
+                else:
+                    self.export_yaml(sections, self.convert_output)
+                logger.info(f"{file_extension or '.map'} file converted and saved as "
+                            f"{self.convert_output}")
                 exit(0)
-            return self.parse_yaml('map.yaml')
+            return sections
 
         if file_extension in ['.yaml', '.yml']:
             if self.convert:
-                logger.error("--convert flag requires a .map file")
+                logger.error("--convert flag requires a .map or ELF file")
                 exit(-1)
             return self.parse_yaml(self.input_filename)
 
-        logger.error(f"Wrong map file extension: '{file_extension}'. Use .map or .yaml files")
+        if file_extension == '.json':
+            if self.convert:
+                logger.error("--convert flag requires a .map or ELF file")
+                exit(-1)
+            return self.parse_json(self.input_filename)
+
+        logger.error(f"Wrong map file extension: '{file_extension}'. Use .map, .elf, .axf, .yaml "
+                     f"or .json files")
         sys.exit(-1)
 
     @staticmethod
     def parse_yaml(filename):
-        sections = []
+        # PyYAML is only imported when needed, as .map and .json files don't use it
+        # pylint: disable=import-outside-toplevel
+        from yaml_io import load_yaml
 
         with open(filename, 'r', encoding='utf-8') as file:
-            y = yaml.safe_load(file)
+            y = load_yaml(file)
 
-        for element in y['map']:
+        return MapFileLoader.get_sections_from_elements(y['map'])
+
+    @staticmethod
+    def parse_json(filename):
+        with open(filename, 'r', encoding='utf-8') as file:
+            j = json.load(file)
+
+        return MapFileLoader.get_sections_from_elements(j['map'])
+
+    @staticmethod
+    def get_sections_from_elements(elements):
+        """
+        Build a list of sections from the elements of a .yaml or .json map file
+
+        :param elements: List of dictionaries describing each section
+        :return: List of sections
+        """
+        sections = []
+
+        for element in elements:
             sections.append(Section(address=element['address'],
                                     size=element['size'],
                                     id=element['id'],
                                     name=element.get('name'),
                                     parent=element.get('parent', 'none'),
                                     _type=element.get('type', 'area'),
-                                    flags=element.get('flags', '')
+                                    flags=element.get('flags', 0),
+                                    lma=element.get('lma'),
+                                    origin=element.get('origin')
                                     )
                             )
 
         return sections
 
     @staticmethod
-    def parse_map(input_filename):
-        GNULinkerMapParser(input_filename=input_filename, output_filename='map.yaml').parse()
+    def get_elements_from_sections(sections):
+        """
+        Build the elements of a .yaml or .json map file from a list of sections
+
+        :param sections: List of sections
+        :return: List of dictionaries describing each section
+        """
+        map_elements = []
+
+        for section in sections:
+            element = {
+                'type': section.type,
+                'address': section.address,
+                'size': section.size,
+                'id': section.id,
+                'flags': section.flags
+            }
+            if section.parent is not None:
+                element['parent'] = section.parent
+            if section.name is not None:
+                element['name'] = section.name
+            if section.lma is not None:
+                element['lma'] = section.lma
+            if section.origin is not None:
+                element['origin'] = section.origin
+            map_elements.append(element)
+
+        return map_elements
+
+    @staticmethod
+    def export_yaml(sections, filename):
+        """
+        Save a list of sections as a .yaml map file, that can be later used as input file
+
+        :param sections: List of sections to be saved
+        :param filename: Name of the .yaml file to write
+        """
+        # pylint: disable=import-outside-toplevel
+        from yaml_io import dump_yaml
+
+        with open(filename, 'w', encoding='utf8') as file:
+            dump_yaml({'map': MapFileLoader.get_elements_from_sections(sections)}, file)
+
+    @staticmethod
+    def export_json(sections, filename):
+        """
+        Save a list of sections as a .json map file, that can be later used as input file
+
+        :param sections: List of sections to be saved
+        :param filename: Name of the .json file to write
+        """
+        with open(filename, 'w', encoding='utf8') as file:
+            json.dump({'map': MapFileLoader.get_elements_from_sections(sections)},
+                      file,
+                      separators=(',', ':'))
+
+    @staticmethod
+    def get_map_parser(input_filename):
+        """
+        Get the parser of the format of a .map file, recognized from its first bytes
+
+        :param input_filename: Name of the .map file, or `-` for the standard input
+        :return: `MapParser` subclass to parse the .map file with
+        """
+        if input_filename == '-':
+            # Peeking leaves the bytes at the standard input, to be read again by the parser
+            header = sys.stdin.buffer.peek(SNIFF_SIZE)[:SNIFF_SIZE]
+        else:
+            with open(input_filename, 'rb') as file:
+                header = file.read(SNIFF_SIZE)
+
+        for parser_class in MAP_PARSERS:
+            if parser_class.sniff(header):
+                return parser_class
+
+        return GNULinkerMapParser
+
+    @staticmethod
+    def parse_map(input_filename, cache=None, jobs=1):
+        """
+        Get the sections of a .map or ELF file, parsing it only if it is not cached yet
+
+        :param input_filename: Name of the .map or ELF file, or `-` for the standard input
+        :param cache: Optional, `MapCache` to load parsed sections from and store them to
+        :param jobs: Number of worker processes parsing the .map file, if its parser is able to
+        :return: List of sections
+        """
+        parser_class = MapFileLoader.get_map_parser(input_filename)
+        logger.debug(f"Parsing '{input_filename}' with {parser_class.__name__}")
+
+        # The standard input can't be read twice, to get its cache key and then parse it
+        if cache is None or input_filename == '-':
+            return parser_class(input_filename=input_filename).parse(jobs)
+
+        key = cache.get_key(input_filename, f'{parser_class.__name__}-{parser_class.VERSION}')
+        sections = cache.load(key)
+
+        if sections is not None:
+            logger.debug(f"Using cached sections for '{input_filename}'")
+            return sections
+
+        sections = parser_class(input_filename=input_filename).parse(jobs)
+        cache.store(key, sections)
+
+        return sections
@@ -0,0 +1,178 @@
+import mmap
+import os
+import re
+import sys
+
+from section import Section
+
+# Size of the blocks read from inputs that can't be memory mapped, such as the standard input
+BLOCK_SIZE = 1024 * 1024
+
+# Already parsed pages of a memory mapped map file are released every time this many bytes are
+# parsed, so they are not kept resident and memory usage doesn't grow with the map file size
+RELEASE_SIZE = 16 * 1024 * 1024
+
+
+class MapParser:
+    """
+    Base of the linker map file parsers, one for each map file format
+
+    Map files are memory mapped and searched as bytes, so they are neither decoded nor split in
+    lines. Inputs that can't be memory mapped, such as the standard input (`-` as map file name),
+    are read in blocks instead. Parsers implement `sniff()`, to tell their format apart from its
+    first bytes, and `_iter_buffer_sections()`, which parses the entries of the map file into the
+    same model for all formats: memory regions, areas (output sections), sections (input
+    sections), fills and symbols
+    """
+    # Bump whenever a change of the parser modifies its results, so cached results are discarded
+    VERSION = 1
+
+    # Lines that can start a part of the map file to be parsed on its own, so that blocks read
+    # from inputs that can't be memory mapped never split an entry
+    PART_START_PATTERN = re.compile(rb'\n')
+
+    def __init__(self, input_filename):
+        self.sections = []
+        self.subsections = []
+        self.input_filename = input_filename
+
+    @staticmethod
+    def sniff(header: bytes) -> bool:
+        """
+        Check whether a map file has the format of this parser
+
+        :param header: First bytes of the map file
+        :return: True if the map file can be parsed by this parser
+        """
+        raise NotImplementedError
+
+    def iter_sections(self):
+        """
+        Lazily parse the map file, yielding its entries in the order they appear at it
+
+        :return: A generator of `Section` objects
+        """
+        if self.input_filename == '-':
+            yield from self._iter_buffer_sections(self._read_parts(sys.stdin.buffer))
+            return
+
+        with open(self.input_filename, 'rb') as file:
+            if not file.seekable() or os.fstat(file.fileno()).st_size == 0:
+                yield from self._iter_buffer_sections(self._read_parts(file))
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                yield from self._iter_buffer_sections([(mapped, 0, len(mapped))])
+
+    def _iter_buffer_sections(self, parts):
+        """
+        Parse the entries of a map file from its bytes
+
+        :param parts: Iterable over consecutive parts of the map file, as (buffer, start, end)
+                      tuples, with the offsets of the part at the buffer. Lines are searched from
+                      the line end before them, which is kept at the start of every part but the
+                      first one
+        :return: A generator of `Section` objects
+        """
+        raise NotImplementedError
+
+    def _get_last_part_start(self, buffer) -> int:
+        """
+        Get the offset of the last line of a buffer that can start a part of the map file (see
+        `PART_START_PATTERN`), or 0 if there is none
+        """
+        offset = len(buffer)
+        while offset > 0:
+            offset = buffer.rfind(b'\n', 0, offset)
+            if offset == -1:
+                return 0
+            if self.PART_START_PATTERN.match(buffer, offset) is not None:
+                return offset + 1
+        return 0
+
+    def _read_parts(self, file):
+        """
+        Read a map file in blocks, cut so that no entry is split between two of them
+
+        :param file: Binary file object to read from
+        :return: A generator of (buffer, start, end) tuples, with the part of each buffer to parse
+        """
+        pending = b''
+        while True:
+            block = file.read(BLOCK_SIZE)
+            if not block:
+                break
+
+            buffer = pending + block
+            end = self._get_last_part_start(buffer)
+            if end > 0:
+                yield buffer, 0, end
+                # The line end before the next part is kept, as lines are searched from it
+                pending = buffer[end - 1:]
+            else:
+                pending = buffer
+
+        if pending:
+            yield pending, 0, len(pending)
+
+    @staticmethod
+    def _can_release(buffer) -> bool:
+        """
+        Check whether the parsed pages of a buffer can be released (see `_release_parsed()`)
+        """
+        return isinstance(buffer, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED')
+
+    @staticmethod
+    def _release_parsed(buffer, released, offset) -> int:
+        """
+        Release the pages of a memory mapped map file parsed long enough before a given offset.
+        Called every time `RELEASE_SIZE` bytes are parsed
+
+        :param buffer: Memory mapped map file being parsed
+        :param released: Offset up to which pages were already released
+        :param offset: Offset being parsed
+        :return: Offset up to which pages are released now
+        """
+        release_end = offset - RELEASE_SIZE // 2
+        release_end -= release_end % mmap.PAGESIZE
+        buffer.madvise(mmap.MADV_DONTNEED, released, release_end - released)
+        return release_end
+
+    @staticmethod
+    def get_section_id(name) -> str:
+        """
+        Get the id of an input section from its name, leaving out the output section name prefix
+        of sections such as `.text.main`
+        """
+        separator = name.find('.', 1)
+        if name[:1] == '.' and 1 < separator < len(name) - 1:
+            return name[separator + 1:]
+        return name
+
+    def parse(self, jobs=1) -> [Section]:  # pylint: disable=unused-argument
+        """
+        Parse the whole map file
+
+        :param jobs: Number of worker processes parsing the map file. Only used by parsers
+                     able to parse in parallel
+        :return: A list with all the memory regions and areas found at the map file, followed by
+                 all its input sections, fills and symbols
+        """
+        return self._store(self.iter_sections())
+
+    def _store(self, sections) -> [Section]:
+        """
+        Keep the parsed entries of the map file, memory regions and areas apart from the rest
+
+        :param sections: Iterable over the parsed entries, in the order they appear at the map file
+        :return: A list with all the memory regions and areas, followed by all the other entries
+        """
+        for section in sections:
+            if section.type in ('region', 'area'):
+                self.sections.append(section)
+            else:
+                self.subsections.append(section)
+
+        return self.sections + self.subsections
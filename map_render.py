@@ -1,12 +1,41 @@
+import os
+import re
+from functools import lru_cache
 from math import cos
-from svgwrite import Drawing
-import svgwrite
 
 from helpers import DefaultAppValues
 from labels import Side
 from logger import logger
 from section import Section
 from style import Style
+from svg_writer import SvgElement, SvgWriter
+
+# Renderer whose subareas are drawn by the worker processes, inherited from the parent process
+_worker_render = None
+
+# Symbols and CSS classes are referenced with placeholders at the fragments drawn by worker
+# processes, and replaced by their actual names once the fragments are written in order
+_FRAGMENT_SYMBOL_PATTERN = re.compile(r'<defs><g id="__ls_symbol_(\d+)__">.*?</defs>', re.DOTALL)
+_FRAGMENT_REFERENCE_PATTERN = re.compile(r'__ls_(symbol|class)_(\d+)__')
+
+
+def _draw_fragment(index) -> tuple:
+    """
+    Draw a subarea at a worker process
+
+    :param index: Index of the subarea, in drawing order
+    :return: See `MapRender._make_fragment()`
+    """
+    return _worker_render._make_fragment(_worker_render.fragment_subareas[index])
+
+
+@lru_cache(maxsize=None)
+def _cosine_wave(length, period) -> tuple:
+    """
+    Get the cosine of `i / period` for every `i` in `range(length)`, computed only once for
+    every distinct wave
+    """
+    return tuple(cos(i / period) for i in range(length))
 
 
 class MapRender:
@@ -16,11 +45,13 @@ class MapRender:
     Takes all the graphical information stored at the different sections and areas, together
     with their style and configuration, and convert them to SVG objects (see `draw()` function)
     """
-    dwg: Drawing
+    dwg: SvgWriter
     pointer_y: int
 
     def __init__(self, area_view, links, file='map.svg', size=DefaultAppValues.DOCUMENT_SIZE, **kwargs):
         self.style = kwargs.get('style')
+        self.css_styles = kwargs.get('css_styles', False)
+        self.css_classes = {}
         self.type = type
         self.area_views = area_view
         self.current_style = Style()
@@ -28,10 +59,108 @@ class MapRender:
         self.links_sections = self._get_valid_linked_sections(links.sections) if links is not None else []
         self.file = file
         self.size = size
-        self.dwg = svgwrite.Drawing(file,
-                                    profile='full',
-                                    size=self.size
-                                    )
+        if os.path.splitext(file)[1].lower() == '.png':
+            # pylint: disable=import-outside-toplevel
+            from png_writer import PngWriter
+            self.dwg = PngWriter(file, size=self.size, scale=kwargs.get('scale', 1.0))
+            if self.css_styles:
+                logger.warning("CSS styles are only available for .svg outputs, and will be "
+                               "ignored")
+                self.css_styles = False
+        else:
+            self.dwg = SvgWriter(file, size=self.size, validate=kwargs.get('validate', True))
+        # Identifiers of the symbols already declared at the document, by their geometry and style
+        self.symbols = {}
+
+        self.jobs = kwargs.get('jobs', 1) or 1
+        # Subareas drawn by worker processes, and, while drawing a fragment at a worker, its group
+        # and the symbols and CSS classes it references, by their index at the fragment
+        self.fragment_subareas = []
+        self.fragment_group = None
+        self.fragment_symbols = {}
+        self.fragment_classes = {}
+
+    def _style_attributes(self, **attributes):
+        """
+        Get the presentation attributes for an element
+
+        By default, attributes are given back as they are, to be set at the element itself. When
+        CSS styles are enabled, each distinct set of attributes is declared only once as a CSS
+        class at the document, and the element only references that class
+
+        :param attributes: Presentation attributes of the element
+        :return: Attributes to pass to the element constructor
+        """
+        if not self.css_styles:
+            return attributes
+
+        key = tuple(sorted(attributes.items()))
+        if self.fragment_group is not None:
+            index = self.fragment_classes.setdefault(key, len(self.fragment_classes))
+            return {'class_': f'__ls_class_{index}__'}
+
+        class_name = self.css_classes.get(key)
+
+        if class_name is None:
+            class_name = f'ls{len(self.css_classes)}'
+            self.css_classes[key] = class_name
+
+        return {'class_': class_name}
+
+    def _get_symbol(self, key, make_elements) -> str:
+        """
+        Get a symbol, declaring it at the document the first time it is needed
+
+        Symbols are graphics repeated along the diagram, such as breaks or arrows. They are
+        declared only once, and then instanced by every element showing them (see `_make_use()`)
+
+        :param key: Tuple with the kind of symbol first, and then every property its graphics
+                    depend on
+        :param make_elements: Function returning the elements of the symbol
+        :return: Identifier of the symbol
+        """
+        if self.fragment_group is not None:
+            if key in self.fragment_symbols:
+                return f"__ls_symbol_{self.fragment_symbols[key]}__"
+            symbol_id = f"__ls_symbol_{len(self.fragment_symbols)}__"
+            self.fragment_symbols[key] = len(self.fragment_symbols)
+            target = self.fragment_group
+        else:
+            symbol_id = self.symbols.get(key)
+            if symbol_id is not None:
+                return symbol_id
+            symbol_id = f"{key[0]}-{len(self.symbols)}"
+            self.symbols[key] = symbol_id
+            target = self.dwg
+
+        symbol = self.dwg.g(id=symbol_id)
+        for element in make_elements():
+            symbol.add(element)
+        defs = self.dwg.defs()
+        defs.add(symbol)
+        target.add(defs)
+
+        return symbol_id
+
+    def _make_use(self, symbol_id, x=0, y=0) -> SvgElement:
+        return self.dwg.use(f"#{symbol_id}", insert=(x, y))
+
+    def _make_css_style(self):
+        """
+        Make the document style sheet, with a CSS class for each distinct set of attributes
+        :return: SVG style element
+        """
+        rules = []
+
+        for key, class_name in self.css_classes.items():
+            declarations = []
+            for name, value in key:
+                if name == 'font_size' and isinstance(value, (int, float)):
+                    value = f'{value}px'
+                declarations.append(f"{name.replace('_', '-')}:{value}")
+            rules.append(f".{class_name}{{{';'.join(declarations)}}}")
+
+        return self.dwg.style('\n'.join(rules))
 
     def _get_valid_linked_sections(self, linked_sections):
         """
@@ -67,7 +196,10 @@ class MapRender:
                 if appended:
                     break
 
-                for section in area.sections.get_sections():
+                # Only sections with the linked ids are relevant, look them up instead of
+                # going through every section of the area
+                linked_ids = linked_section if multi_section else [linked_section]
+                for section in area.sections.find_by_ids(linked_ids):
                     # If single section, the start and end address of the linked section equals
                     # those of the section
                     if not multi_section:
@@ -106,7 +238,7 @@ class MapRender:
 
         dwg = self.dwg
 
-        def _draw_area(area) -> svgwrite.container.Group:
+        def draw_area(area, fragments):
             """
             Draw given area
 
@@ -114,31 +246,32 @@ class MapRender:
             the different elements. Those are the frame and sections, with its
             information such as labels, name, memory, etc...
 
+            Elements are written as they are made, so sections don't need to be kept in memory
+            once drawn
+
             :param area: Area to be drawn
-            :return Container with an area to be drawn
+            :param fragments: Iterator over the subareas already drawn by worker processes, in
+                              drawing order, or None to draw the subareas here
             """
-            area_group = dwg.g()
+            dwg.start_group()
             title = self._make_title(area)
             title.translate(area.pos_x, area.pos_y)
-            area_group.add(title)
+            dwg.add(title)
 
             for sub_area in area.get_split_area_views():
-                subarea_group = dwg.g()
-
-                subarea_group.add(self._make_main_frame(sub_area))
-
-                for section in sub_area.sections.get_sections():
-                    if section.is_hidden():
-                        continue
-                    self._make_section(subarea_group, section, sub_area)
+                if fragments is not None:
+                    self._write_fragment(*next(fragments))
+                    continue
 
+                subarea_group = dwg.g()
                 subarea_group.translate(sub_area.pos_x, sub_area.pos_y)
+                dwg.start_group(subarea_group)
+                self._draw_subarea(dwg, sub_area)
+                dwg.end_group()
 
-                area_group.add(subarea_group)
-
-            return area_group
+            dwg.end_group()
 
-        def draw_section_links() -> svgwrite.container.Group:
+        def draw_section_links() -> SvgElement:
             linked_sections_group = dwg.g()
             for section_link in self.links_sections:
                 is_drawn = False
@@ -160,7 +293,7 @@ class MapRender:
 
             return linked_sections_group
 
-        def draw_labels() -> svgwrite.container.Group:
+        def draw_labels() -> SvgElement:
             global_labels = dwg.g()
             for area in self.area_views:
                 for subarea in area.get_split_area_views():
@@ -176,47 +309,170 @@ class MapRender:
                     global_labels.add(g)
             return global_labels
 
-        def draw_growths() -> svgwrite.container.Group:
+        def draw_growths():
             # We need to do another pass once all areas are drawn in order to be able to properly
             # draw the growth arrows without the break areas hiding them. Also, as we do stuff
             # outside the loop where the areas are drawn, we loose the reference for translation,
             # and we have to manually translate the grows here
+            dwg.start_group()
             for _area_view in self.area_views:
                 for subarea in _area_view.get_split_area_views():
 
                     area_growth = dwg.g()
-                    for section in subarea.sections.get_sections():
-                        if section.is_hidden():
-                            continue
-                        area_growth.add(self._make_growth(section))
-
                     area_growth.translate(subarea.pos_x, subarea.pos_y)
-                    growths_group.add(area_growth)
-            return growths_group
+                    dwg.start_group(area_growth)
+                    for section in subarea.drawn_sections.get_sections():
+                        if section.is_hidden() or \
+                                not (section.is_grow_up() or section.is_grow_down()):
+                            continue
+                        dwg.add(self._make_growth(section))
+                    dwg.end_group()
+            dwg.end_group()
 
-        def draw_links() -> svgwrite.container.Group:
+        def draw_links() -> SvgElement:
             lines_group = dwg.g()
             for address in self.links.addresses:
                 lines_group.add(self._make_link(address, self.links.style))
             return lines_group
 
-        dwg.add(dwg.rect(insert=(0, 0),
-                         size=('100%', '100%'),
-                         rx=None,
-                         ry=None,
-                         fill=self.style.background))
+        with dwg:
+            dwg.add(dwg.rect(insert=(0, 0),
+                             size=('100%', '100%'),
+                             rx=None,
+                             ry=None,
+                             fill=self.style.background))
 
-        growths_group = dwg.g()
+            dwg.add(draw_section_links()) if self.links_sections is not None else None
+            dwg.add(draw_links()) if self.links is not None else None
 
-        dwg.add(draw_section_links()) if self.links_sections is not None else None
-        dwg.add(draw_links()) if self.links is not None else None
+            fragments = self._draw_fragments()
+            for area_view in self.area_views:
+                draw_area(area_view, fragments)
 
-        for area_view in self.area_views:
-            dwg.add(_draw_area(area_view))
+            dwg.add(draw_labels())
+            draw_growths()
 
-        dwg.add(draw_labels())
-        dwg.add(draw_growths())
-        dwg.save()
+            # Style sheet is complete only once all elements are made, so it goes at the end
+            if self.css_styles:
+                defs = dwg.defs()
+                defs.add(self._make_css_style())
+                dwg.add(defs)
+
+    def _draw_subarea(self, group, sub_area):
+        """
+        Draw the frame and the sections of a subarea
+
+        :param group: Group or writer where the elements are added
+        :param sub_area: Subarea to be drawn
+        """
+        group.add(self._make_main_frame(sub_area))
+
+        for section in sub_area.drawn_sections.get_sections():
+            if section.is_hidden():
+                continue
+            self._make_section(group, section, sub_area)
+
+    def _draw_fragments(self):
+        """
+        Draw all the subareas in parallel, at a pool of `jobs` worker processes
+
+        Each worker draws a subarea into a serialized fragment (see `_make_fragment()`). Fragments
+        are given back in drawing order, so the output is the same as when drawing them one after
+        the other
+
+        :return: Iterator over the fragments of every subarea, in drawing order, or None if
+                 subareas have to be drawn by the current process
+        """
+        global _worker_render  # pylint: disable=global-statement
+
+        self.fragment_subareas = [sub_area for area in self.area_views
+                                  for sub_area in area.get_split_area_views()]
+        workers = min(self.jobs, len(self.fragment_subareas))
+        # Raster outputs can't be drawn into fragments
+        if workers <= 1 or type(self.dwg) is not SvgWriter:  # pylint: disable=unidiomatic-typecheck
+            return None
+        # Worker processes are only loaded when needed, as most diagrams are drawn serially
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ProcessPoolExecutor
+        from helpers import get_process_context
+
+        context = get_process_context()
+        if context.get_start_method() != 'fork':
+            logger.debug("Worker processes can't inherit the areas to draw. Drawing them serially")
+            return None
+
+        # Later passes, such as growth arrows, need the sections placed within their subareas
+        for sub_area in self.fragment_subareas:
+            for section in sub_area.drawn_sections.get_sections():
+                if not section.is_hidden():
+                    self._place_section(section, sub_area)
+
+        def fragments():
+            global _worker_render  # pylint: disable=global-statement
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                    yield from executor.map(_draw_fragment, range(len(self.fragment_subareas)))
+            finally:
+                _worker_render = None
+
+        # Workers are forked when the pool is first used, so they inherit the renderer as it is
+        _worker_render = self
+        return fragments()
+
+    def _make_fragment(self, sub_area) -> tuple:
+        """
+        Draw a subarea into a serialized group, at a worker process
+
+        Symbols and CSS classes are referenced with placeholders, as their names depend on the
+        ones declared by the previous fragments (see `_write_fragment()`)
+
+        :param sub_area: Subarea to be drawn
+        :return: A tuple with the serialized group, and the keys of the symbols and CSS classes
+                 it references, by placeholder index
+        """
+        group = self.dwg.g()
+        group.translate(sub_area.pos_x, sub_area.pos_y)
+        self.fragment_group = group
+        self.fragment_symbols = {}
+        self.fragment_classes = {}
+        try:
+            self._draw_subarea(group, sub_area)
+        finally:
+            self.fragment_group = None
+
+        strings = []
+        group.serialize(strings)
+        return ''.join(strings), list(self.fragment_symbols), list(self.fragment_classes)
+
+    def _write_fragment(self, fragment, symbol_keys, class_keys):
+        """
+        Write a subarea drawn by a worker process, replacing its placeholders
+
+        Symbols already declared by a previous fragment are not declared again, and symbols and
+        CSS classes are named as they would have been if the subarea was drawn by this process
+
+        :param fragment: Serialized group of the subarea
+        :param symbol_keys: Keys of the symbols referenced by the fragment
+        :param class_keys: Keys of the CSS classes referenced by the fragment
+        """
+        def replace_reference(match):
+            if match.group(1) == 'symbol':
+                return self.symbols[symbol_keys[int(match.group(2))]]
+
+            key = class_keys[int(match.group(2))]
+            if key not in self.css_classes:
+                self.css_classes[key] = f'ls{len(self.css_classes)}'
+            return self.css_classes[key]
+
+        def replace_symbol(match):
+            key = symbol_keys[int(match.group(1))]
+            if key in self.symbols:
+                return ''
+            self.symbols[key] = f"{key[0]}-{len(self.symbols)}"
+            return _FRAGMENT_REFERENCE_PATTERN.sub(replace_reference, match.group(0))
+
+        fragment = _FRAGMENT_SYMBOL_PATTERN.sub(replace_symbol, fragment)
+        self.dwg.add_serialized(_FRAGMENT_REFERENCE_PATTERN.sub(replace_reference, fragment))
 
     def _make_title(self, area_view):
         title_pos_x = area_view.size_x / 2
@@ -228,7 +484,7 @@ class MapRender:
                                text_type='title'
                                )
 
-    def _make_growth(self, section: Section) -> svgwrite.container.Group:
+    def _make_growth(self, section: Section) -> SvgElement:
         """
         Make the growth arrows for the sections that have it
         :param section: Section for which to draw the arrow
@@ -236,81 +492,99 @@ class MapRender:
         """
         group = self.dwg.g()
         # Why grows doesn't draw on a break section?
-        multiplier = section.style.growth_arrow_size
+        style = section.style
         mid_point_x = (section.pos_x + section.size_x) / 2
-        arrow_head_width = 5 * multiplier
-        arrow_head_height = 10 * multiplier
-        arrow_length = 10 * multiplier
-        arrow_tail_width = 1 * multiplier
-
-        def _make_growth_arrow_generic(arrow_start_y, direction):
-            points_list = [(mid_point_x - arrow_tail_width, arrow_start_y),
-                           (mid_point_x - arrow_tail_width,
-                            arrow_start_y - direction * arrow_length),
-                           (mid_point_x - arrow_head_width,
-                            arrow_start_y - direction * arrow_head_height),
-                           (mid_point_x,
-                            arrow_start_y - direction * (arrow_length + arrow_head_height)),
-                           (mid_point_x + arrow_head_width,
-                            arrow_start_y - direction * arrow_head_height),
-                           (mid_point_x + arrow_tail_width,
-                            arrow_start_y - direction * arrow_length),
-                           (mid_point_x + arrow_tail_width,
-                            arrow_start_y)]
-
-            group.add(self.dwg.polyline(points_list,
-                                        stroke=section.style.growth_arrow_stroke,
-                                        stroke_width=1,
-                                        fill=section.style.growth_arrow_fill))
+
+        def _make_growth_arrow_generic(direction):
+            """
+            Make the elements of a growth arrow, starting at (0, 0)
+            """
+            multiplier = style.growth_arrow_size
+            arrow_head_width = 5 * multiplier
+            arrow_head_height = 10 * multiplier
+            arrow_length = 10 * multiplier
+            arrow_tail_width = 1 * multiplier
+
+            points_list = [(0 - arrow_tail_width, 0),
+                           (0 - arrow_tail_width, 0 - direction * arrow_length),
+                           (0 - arrow_head_width, 0 - direction * arrow_head_height),
+                           (0, 0 - direction * (arrow_length + arrow_head_height)),
+                           (0 + arrow_head_width, 0 - direction * arrow_head_height),
+                           (0 + arrow_tail_width, 0 - direction * arrow_length),
+                           (0 + arrow_tail_width, 0)]
+
+            return [self.dwg.polyline(points_list,
+                                      **self._style_attributes(
+                                          stroke=style.growth_arrow_stroke,
+                                          stroke_width=1,
+                                          fill=style.growth_arrow_fill))]
+
+        def add_growth_arrow(arrow_start_y, direction):
+            key = ('growth', direction, style.growth_arrow_size, style.growth_arrow_stroke,
+                   style.growth_arrow_fill)
+            symbol_id = self._get_symbol(key, lambda: _make_growth_arrow_generic(direction))
+            group.add(self._make_use(symbol_id, mid_point_x, arrow_start_y))
 
         if section.is_grow_up():
-            _make_growth_arrow_generic(section.pos_y, 1)
+            add_growth_arrow(section.pos_y, 1)
         if section.is_grow_down():
-            _make_growth_arrow_generic(section.pos_y + section.size_y, -1)
+            add_growth_arrow(section.pos_y + section.size_y, -1)
 
         return group
 
     def _make_main_frame(self, area_view):
         return self.dwg.rect((0, 0), (area_view.size_x, area_view.size_y),
-                             fill=area_view.style.background,
-                             stroke=area_view.style.stroke,
-                             stroke_width=area_view.style.stroke_width)
+                             **self._style_attributes(fill=area_view.style.background,
+                                                      stroke=area_view.style.stroke,
+                                                      stroke_width=area_view.style.stroke_width))
 
     def _make_box(self, section: Section):
         return self.dwg.rect((section.pos_x, section.pos_y),
                              (section.size_x, section.size_y),
-                             fill=section.style.fill,
-                             stroke=section.style.stroke,
-                             stroke_width=section.style.stroke_width)
+                             **self._style_attributes(fill=section.style.fill,
+                                                      stroke=section.style.stroke,
+                                                      stroke_width=section.style.stroke_width))
 
-    def _make_break(self, section: Section) -> svgwrite.container.Group:
+    def _make_break(self, section: Section) -> SvgElement:
         """
         Make a break representation for a given section.
 
         Depending on the selected break type (at style/break_type), break can be wave (~), double
-        wave(≈), diagonal(/) or dots(...)
+        wave(≈), diagonal(/) or dots(...). Graphics of each distinct break are declared only once
+        as a symbol, which is then placed at the section position
         :param section: Section for which the break wants to be created
-        :return: SVG group container with the breaks graphics
+        :return: SVG element instancing the break graphics
         """
-        group = self.dwg.g()
-        mid_point_x = (section.pos_x + section.size_x) / 2
-        mid_point_y = (section.pos_y + section.size_y) / 2
         style = section.style
+        key = ('break', style.break_type, section.size_x, section.size_y, style.fill,
+               style.stroke, style.stroke_width, style.text_fill)
+        symbol_id = self._get_symbol(
+            key, lambda: self._make_break_elements(section.size_x, section.size_y, style))
+        return self._make_use(symbol_id, section.pos_x, section.pos_y)
 
-        def _make_break_dots(_section: Section) -> svgwrite.container.Group:
+    def _make_break_elements(self, size_x, size_y, style) -> [SvgElement]:
+        """
+        Make the graphics of a break, for a break section placed at (0, 0)
+
+        :param size_x: Width of the break section in pixels
+        :param size_y: Height of the break section in pixels
+        :param style: Style of the break section
+        :return: List of SVG elements of the break
+        """
+        mid_point_x = size_x / 2
+        mid_point_y = size_y / 2
+
+        def _make_break_dots() -> [SvgElement]:
             """
             Make a break representation using dot style
 
-            :param _section: Section for which the break wants to be created
-            :return: SVG group container with the breaks graphics
+            :return: List of SVG elements of the break
             """
-            rectangle = self.dwg.rect((_section.pos_x, _section.pos_y),
-                                      (_section.size_x, _section.size_y))
-
-            rectangle.fill(style.fill)
-            rectangle.stroke(style.stroke, width=style.stroke_width)
-
-            group.add(rectangle)
+            elements = [self.dwg.rect((0, 0),
+                                      (size_x, size_y),
+                                      **self._style_attributes(fill=style.fill,
+                                                               stroke=style.stroke,
+                                                               stroke_width=style.stroke_width))]
 
             points_list = [
                 (mid_point_x, mid_point_y),
@@ -319,117 +593,114 @@ class MapRender:
             ]
 
             for points_set in points_list:
-                group.add(self.dwg.circle(points_set, 3, fill=style.text_fill))
+                elements.append(self.dwg.circle(points_set, 3,
+                                                **self._style_attributes(fill=style.text_fill)))
 
-            return group
+            return elements
 
-        def _make_break_wave(_section: Section) -> svgwrite.container.Group:
+        def _make_break_wave() -> [SvgElement]:
             """
             Make a break representation using wave style
 
-            :param _section: Section for which the break wants to be created
-            :return: SVG group container with the breaks graphics
+            :return: List of SVG elements of the break
             """
-            wave_len = _section.size_x + 1
-            shifts = [(-5, 2/5, 0), (5, 3 / 5, _section.size_y), ]
+            elements = []
+            wave = _cosine_wave(size_x + 1, 24)
+            shifts = [(-5, 2/5, 0), (5, 3 / 5, size_y), ]
 
             for shift in shifts:
-                points = [(i, mid_point_y + shift[0] + 2 * cos(i / 24)) for i in range(wave_len)]
+                points = [(i, mid_point_y + shift[0] + 2 * value) for i, value in enumerate(wave)]
                 points.extend(
                     [
-                        (_section.pos_x + _section.size_x,
-                         (_section.pos_y + _section.size_y) * shift[1]),
-                        (_section.pos_x + _section.size_x, _section.pos_y + shift[2]),
-                        (_section.pos_x, _section.pos_y + shift[2]),
-                        (_section.pos_x, mid_point_y + shift[0] + 2 * cos(_section.pos_x / 24)),
+                        (size_x, size_y * shift[1]),
+                        (size_x, shift[2]),
+                        (0, shift[2]),
+                        (0, mid_point_y + shift[0] + 2 * wave[0]),
                     ]
                 )
 
-                group.add(self.dwg.polyline(points,
-                                            stroke=style.stroke,
-                                            stroke_width=style.stroke_width,
-                                            fill=style.fill))
+                elements.append(self.dwg.polyline(points,
+                                                  **self._style_attributes(
+                                                      stroke=style.stroke,
+                                                      stroke_width=style.stroke_width,
+                                                      fill=style.fill)))
 
-            return group
+            return elements
 
-        def _make_break_double_wave(_section: Section) -> svgwrite.container.Group:
+        def _make_break_double_wave() -> [SvgElement]:
             """
             Make a break representation using double wave style
 
-            :param _section: Section for which the break wants to be created
-            :return: SVG group container with the breaks graphics
+            :return: List of SVG elements of the break
             """
             points_list = [[
-                (_section.pos_x, (_section.pos_y + _section.size_y) * 2 / 5),
-                (_section.pos_x, _section.pos_y),
-                (_section.pos_x + _section.size_x, _section.pos_y),
-                (_section.pos_x + _section.size_x, (_section.pos_y + _section.size_y) * 2 / 5),
+                (0, size_y * 2 / 5),
+                (0, 0),
+                (size_x, 0),
+                (size_x, size_y * 2 / 5),
             ],
                 [
-                    (_section.pos_x, (_section.pos_y + _section.size_y) * 3 / 5),
-                    (_section.pos_x, _section.pos_y + _section.size_y),
-                    (_section.pos_x + _section.size_x, _section.pos_y + _section.size_y),
-                    (_section.pos_x + _section.size_x, (_section.pos_y + _section.size_y) * 3 / 5),
+                    (0, size_y * 3 / 5),
+                    (0, size_y),
+                    (size_x, size_y),
+                    (size_x, size_y * 3 / 5),
                 ]
             ]
 
-            rectangle = self.dwg.rect((_section.pos_x, _section.pos_y),
-                                      (_section.size_x, _section.size_y))
-            rectangle.fill(section.style.fill)
-            group.add(rectangle)
+            elements = [self.dwg.rect((0, 0),
+                                      (size_x, size_y),
+                                      **self._style_attributes(fill=style.fill))]
 
             for points_set in points_list:
-                group.add(self.dwg.polyline(points_set,
-                                            stroke=style.stroke,
-                                            stroke_width=style.stroke_width,
-                                            fill='none'))
+                elements.append(self.dwg.polyline(points_set,
+                                                  **self._style_attributes(
+                                                      stroke=style.stroke,
+                                                      stroke_width=style.stroke_width,
+                                                      fill='none')))
             wave_length = 20
+            wave = _cosine_wave(wave_length, 2)
             shifts = [(0, -5),
                       (0, +5),
-                      (_section.size_x, -5),
-                      (_section.size_x, +5),
+                      (size_x, -5),
+                      (size_x, +5),
                       ]
 
             for shift in shifts:
-                points = [(i - wave_length / 2 + shift[0], mid_point_y + shift[1] + cos(i / 2))
-                          for i in range(wave_length)]
+                points = [(i - wave_length / 2 + shift[0], mid_point_y + shift[1] + value)
+                          for i, value in enumerate(wave)]
 
-                group.add(self.dwg.polyline(points,
-                                            stroke=style.stroke,
-                                            stroke_width=style.stroke_width,
-                                            fill='none'))
+                elements.append(self.dwg.polyline(points,
+                                                  **self._style_attributes(
+                                                      stroke=style.stroke,
+                                                      stroke_width=style.stroke_width,
+                                                      fill='none')))
 
-            return group
+            return elements
 
-        def _make_break_diagonal(_section: Section) -> svgwrite.container.Group:
+        def _make_break_diagonal() -> [SvgElement]:
             """
             Make a break representation using diagonal style
 
-            :param _section: Section for which the break wants to be created
-            :return: SVG group container with the breaks graphics
+            :return: List of SVG elements of the break
             """
-            points_list = [[(_section.pos_x, _section.pos_y),
-                            (_section.pos_x + _section.size_x, _section.pos_y),
-                            (_section.pos_x + _section.size_x,
-                             (_section.pos_y + _section.size_y) * 3 / 10),
-                            (_section.pos_x, (_section.pos_y + _section.size_y) * 5 / 10),
-                            (_section.pos_x, _section.pos_y)
-                            ], [(_section.pos_x, _section.pos_y + _section.size_y),
-                                (_section.pos_x + _section.size_x,
-                                 _section.pos_y + _section.size_y),
-                                (_section.pos_x + _section.size_x,
-                                 (_section.pos_y + _section.size_y) * 5 / 10),
-                                (_section.pos_x, (_section.pos_y + _section.size_y) * 7 / 10),
-                                (_section.pos_x, _section.pos_y + _section.size_y),
+            points_list = [[(0, 0),
+                            (size_x, 0),
+                            (size_x, size_y * 3 / 10),
+                            (0, size_y * 5 / 10),
+                            (0, 0)
+                            ], [(0, size_y),
+                                (size_x, size_y),
+                                (size_x, size_y * 5 / 10),
+                                (0, size_y * 7 / 10),
+                                (0, size_y),
                                 ]]
 
-            for points_set in points_list:
-                group.add(self.dwg.polyline(points_set,
-                                            stroke=style.stroke,
-                                            stroke_width=style.stroke_width,
-                                            fill=style.fill))
-
-            return group
+            return [self.dwg.polyline(points_set,
+                                      **self._style_attributes(
+                                          stroke=style.stroke,
+                                          stroke_width=style.stroke_width,
+                                          fill=style.fill))
+                    for points_set in points_list]
 
         breaks = [('/', _make_break_diagonal),
                   ('≈', _make_break_double_wave),
@@ -438,7 +709,9 @@ class MapRender:
 
         for _break in breaks:
             if style.break_type == _break[0]:
-                return _break[1](section)
+                return _break[1]()
+
+        return []
 
     def _make_text(self,
                    text,
@@ -455,15 +728,16 @@ class MapRender:
             size = style.font_size
 
         return self.dwg.text(text, insert=(position[0], position[1]),
-                             stroke=style.text_stroke,
-                             # focusable='true',
-                             fill=style.text_fill,
-                             stroke_width=style.text_stroke_width,
-                             font_size=size,
-                             font_weight="normal",
-                             font_family=style.font_type,
-                             text_anchor=kwargs.get('anchor', 'middle'),
-                             alignment_baseline=kwargs.get('baseline', 'middle')
+                             **self._style_attributes(
+                                 stroke=style.text_stroke,
+                                 # focusable='true',
+                                 fill=style.text_fill,
+                                 stroke_width=style.text_stroke_width,
+                                 font_size=size,
+                                 font_weight="normal",
+                                 font_family=style.font_type,
+                                 text_anchor=kwargs.get('anchor', 'middle'),
+                                 alignment_baseline=kwargs.get('baseline', 'middle'))
                              )
 
     def _make_name(self, section):
@@ -489,12 +763,16 @@ class MapRender:
                                anchor='start',
                                style=section.style)
 
-    def _make_section(self, group, section: Section, area_view):
+    @staticmethod
+    def _place_section(section: Section, area_view):
         section.size_x = area_view.size_x
         section.size_y = area_view.to_pixels(section.size)
         section.pos_y = area_view.to_pixels(area_view.end_address - section.size - section.address)
         section.pos_x = 0
 
+    def _make_section(self, group, section: Section, area_view):
+        self._place_section(section, area_view)
+
         if section.is_break():
             group.add(self._make_break(section))
         else:
@@ -552,10 +830,10 @@ class MapRender:
         points.extend(_reversed)
 
         return self.dwg.polyline(points,
-                                 stroke=style.stroke,
-                                 stroke_width=style.stroke_width,
-                                 fill=style.fill,
-                                 opacity=style.opacity)
+                                 **self._style_attributes(stroke=style.stroke,
+                                                          stroke_width=style.stroke_width,
+                                                          fill=style.fill,
+                                                          opacity=style.opacity))
 
     def _make_arrow_head(self, label, direction='down'):
         if direction == 'left':
@@ -567,24 +845,25 @@ class MapRender:
         else:
             angle = 180
 
-        arrow_head_width = 5 * label.style.weight
-        arrow_head_height = 10 * label.style.weight
-        group = self.dwg.g()
-        points_list = [(0, 0 - arrow_head_height),
-                       (0 - arrow_head_width, 0 - arrow_head_height),
-                       (0, 0),
-                       (0 + arrow_head_width, 0 - arrow_head_height),
-                       (0, 0 - arrow_head_height),
-                       ]
-
-        poly = self.dwg.polyline(points_list,
-                                 stroke=label.style.stroke,
-                                 stroke_width=1,
-                                 fill=label.style.stroke)
-        poly.rotate(angle, center=(0, 0))
-        group.add(poly)
-
-        return group
+        def make_arrow_head_elements():
+            arrow_head_width = 5 * label.style.weight
+            arrow_head_height = 10 * label.style.weight
+            points_list = [(0, 0 - arrow_head_height),
+                           (0 - arrow_head_width, 0 - arrow_head_height),
+                           (0, 0),
+                           (0 + arrow_head_width, 0 - arrow_head_height),
+                           (0, 0 - arrow_head_height),
+                           ]
+
+            poly = self.dwg.polyline(points_list,
+                                     **self._style_attributes(stroke=label.style.stroke,
+                                                              stroke_width=1,
+                                                              fill=label.style.stroke))
+            poly.rotate(angle, center=(0, 0))
+            return [poly]
+
+        key = ('arrow', angle, label.style.weight, label.style.stroke)
+        return self._make_use(self._get_symbol(key, make_arrow_head_elements))
 
     def _make_label(self, label, area_view):
         line_label_spacer = 3
@@ -646,9 +925,10 @@ class MapRender:
                               anchor=anchor))
 
         g.add(self.dwg.polyline(points,
-                                stroke=label.style.stroke,
-                                stroke_dasharray=label.style.stroke_dasharray,
-                                stroke_width=label.style.stroke_width
+                                **self._style_attributes(
+                                    stroke=label.style.stroke,
+                                    stroke_dasharray=label.style.stroke_dasharray,
+                                    stroke_width=label.style.stroke_width)
                                 ))
         return g
 
@@ -663,8 +943,9 @@ class MapRender:
 
                 def _make_line(x1, y1, x2, y2):
                     return self.dwg.line(start=(x1, y1), end=(x2, y2),
-                                         stroke_width=style.stroke_width,
-                                         stroke=style.stroke)
+                                         **self._style_attributes(
+                                             stroke_width=style.stroke_width,
+                                             stroke=style.stroke))
 
                 points = self._get_points_for_address(address, subarea)
 
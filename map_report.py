@@ -0,0 +1,240 @@
+import csv
+import heapq
+import json
+import sys
+from operator import attrgetter
+
+from configuration import Configuration
+from helpers import safe_element_dict_get, safe_element_list_get
+from logger import logger
+from section import Section
+from sections import Sections
+
+# Columns of .csv reports, where every row is either a memory region, an area, a free gap of an
+# area or one of the biggest sections or symbols of an area
+CSV_COLUMNS = ('table', 'area', 'name', 'parent', 'origin', 'start', 'end', 'size', 'used', 'free',
+               'usage')
+
+# Budget limits, by their name at the configuration file, and the usage property they limit
+BUDGET_LIMITS = {
+    'max-used': 'used',
+    'max-usage': 'usage',
+    'min-free': 'free',
+}
+
+
+def get_coverage(sections: [Section], start: int, end: int) -> (int, [tuple]):
+    """
+    Get the memory covered by a group of sections within an address range, and the gaps among it
+
+    Sections can be nested or overlap, such as input sections within their output section, so
+    covered memory is the union of the sections, not the sum of their sizes
+
+    :param sections: Sections within the address range
+    :param start: First address of the range
+    :param end: End address of the range
+    :return: Tuple with the number of bytes covered by the sections and the list of (start, end)
+             address tuples of the gaps not covered by any of them, in address order
+    """
+    used = 0
+    gaps = []
+    position = start
+    for section in sorted(sections, key=attrgetter('address')):
+        section_end = section.address + section.size
+        if section_end <= position:
+            continue
+        if section.address > position:
+            gaps.append((position, section.address))
+            position = section.address
+        used += section_end - position
+        position = section_end
+
+    if position < end:
+        gaps.append((position, end))
+
+    return used, gaps
+
+
+def get_usage(name, start, end, used) -> {}:
+    size = end - start
+    return {
+        'name': name,
+        'start': start,
+        'end': end,
+        'size': size,
+        'used': used,
+        'free': size - used,
+        'usage': round(used * 100 / size, 2) if size > 0 else None,
+    }
+
+
+def get_entry(section: Section) -> {}:
+    return {
+        'name': section.id,
+        'parent': section.parent,
+        'origin': section.origin,
+        'start': section.address,
+        'end': section.address + section.size,
+        'size': section.size,
+    }
+
+
+class MapReport:
+    """
+    Size and occupancy report of a map, for the areas of a diagram configuration, without drawing
+    anything
+
+    Areas select their sections with the same `range` and `section-size` filters used to draw
+    them, and report the memory used by the drawn sections, its free gaps and their biggest
+    sections and symbols. Memory regions of the map report the memory used by the areas placed
+    at them, including the load image of areas loaded elsewhere, such as initialized data.
+    Budgets of the configuration (`budgets` property) limit the usage of areas and regions
+    """
+    def __init__(self, sections: Sections, configuration: Configuration, top=10):
+        """
+        :param sections: Sections of the map
+        :param configuration: Configuration with the areas to report, and their budgets
+        :param top: Number of biggest sections and symbols reported for each area
+        """
+        self.top = top
+        self.budgets = safe_element_dict_get(configuration.configuration, 'budgets', []) or []
+        self.regions = self._get_regions(sections.get_sections())
+        self.areas = [self._get_area(area, sections, i)
+                      for i, area in enumerate(configuration.areas or [configuration.default_area])]
+
+    @staticmethod
+    def _get_regions(sections: [Section]) -> [{}]:
+        regions = [section for section in sections if section.type == 'region']
+        if not regions:
+            return []
+
+        # Memory taken by each area, and by its load image if it is loaded elsewhere
+        images = []
+        for section in sections:
+            if section.type == 'area' and section.size > 0:
+                images.append(section)
+                if section.lma is not None:
+                    images.append(Section(size=section.size, address=section.lma, id=section.id,
+                                          _type='area', parent=None))
+
+        report = []
+        for region in regions:
+            start = region.address
+            end = region.address + region.size
+            used, _ = get_coverage([image for image in images
+                                    if image.address >= start and
+                                    image.address + image.size <= end],
+                                   start, end)
+            report.append(get_usage(region.id, start, end, used))
+        return report
+
+    def _get_area(self, area, sections: Sections, index) -> {}:
+        selected = area.filter_sections(sections)
+        drawn = selected.get_drawn().get_sections()
+        # Symbols of unknown size, such as linker script assignments, are never among the biggest
+        symbols = [section for section in selected.get_sections()
+                   if section.type == 'symbol' and section.size > 0]
+
+        memory_range = area.memory_range
+        start = safe_element_list_get(memory_range, 0)
+        end = safe_element_list_get(memory_range, 1)
+        if start is None:
+            start = min((section.address for section in drawn), default=0)
+        if end is None:
+            end = max((section.address + section.size for section in drawn), default=start)
+
+        name = safe_element_dict_get(area.area_config, 'title', None) or f'area {index}'
+        used, gaps = get_coverage(drawn, start, end)
+
+        # Input sections are the biggest ones reported, unless the map has none, such as the
+        # ones read from ELF files
+        biggest = [section for section in drawn if section.type == 'section'] or drawn
+
+        return {
+            **get_usage(name, start, end, used),
+            'gaps': [{'start': gap_start, 'end': gap_end, 'size': gap_end - gap_start}
+                     for gap_start, gap_end in gaps],
+            'top-sections': [get_entry(section) for section in
+                             heapq.nlargest(self.top, biggest, key=attrgetter('size'))],
+            'top-symbols': [get_entry(section) for section in
+                            heapq.nlargest(self.top, symbols, key=attrgetter('size'))],
+        }
+
+    def check_budgets(self) -> [str]:
+        """
+        Check the usage of areas and memory regions against the budgets of the configuration
+
+        Budgets are a list, where each budget selects an area by its `title`, with `area`, or a
+        memory region by its name, with `region`, and limits its `max-used` bytes, `max-usage`
+        percentage or `min-free` bytes
+
+        :return: List with a message for each exceeded budget, empty if all are met
+        """
+        exceeded = []
+        for i, budget in enumerate(self.budgets):
+            area_name = safe_element_dict_get(budget, 'area', None)
+            region_name = safe_element_dict_get(budget, 'region', None)
+            usages = self.areas if area_name is not None else self.regions
+            name = area_name if area_name is not None else region_name
+            usage = next((usage for usage in usages if usage['name'] == name), None)
+
+            if usage is None:
+                logger.warning(f"Budget with index {i} refers to an unknown "
+                               f"{'area' if area_name is not None else 'region'} '{name}', and "
+                               f"has been ignored")
+                continue
+
+            for limit_name, key in BUDGET_LIMITS.items():
+                limit = safe_element_dict_get(budget, limit_name, None)
+                if limit is None or usage[key] is None:
+                    continue
+                is_minimum = limit_name.startswith('min')
+                if (usage[key] < limit) if is_minimum else (usage[key] > limit):
+                    exceeded.append(f"'{name}' {key} is {usage[key]}, "
+                                    f"{'under' if is_minimum else 'over'} its {limit_name} "
+                                    f"budget of {limit}")
+        return exceeded
+
+    def get_report(self) -> {}:
+        return {'regions': self.regions, 'areas': self.areas}
+
+    def write(self, filename):
+        """
+        Save the report as a .json file, or as a .csv file with one row for each region, area,
+        gap and biggest section or symbol. `-` writes the .json report to the standard output
+
+        :param filename: Name of the file to write. Its extension, .json or .csv, selects the
+                         format
+        """
+        if filename == '-':
+            json.dump(self.get_report(), sys.stdout, indent=2)
+            sys.stdout.write('\n')
+            return
+
+        with open(filename, 'w', encoding='utf8', newline='') as file:
+            if filename.endswith('.csv'):
+                self._write_csv(file)
+            else:
+                json.dump(self.get_report(), file, indent=2)
+
+    def _write_csv(self, file):
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for region in self.regions:
+            writer.writerow({'table': 'region', **region})
+        for area in self.areas:
+            writer.writerow({'table': 'area', **area})
+            for gap in area['gaps']:
+                writer.writerow({'table': 'gap', 'area': area['name'], **gap})
+            for table in ('top-sections', 'top-symbols'):
+                for entry in area[table]:
+                    writer.writerow({'table': table, 'area': area['name'], **entry})
+
+    def log_summary(self):
+        """
+        Log the usage of every memory region and area
+        """
+        for usage in self.regions + self.areas:
+            percentage = '' if usage['usage'] is None else f" ({usage['usage']}%)"
+            logger.info(f"{usage['name']}: {usage['used']} of {usage['size']} bytes "
+                        f"used{percentage}, {usage['free']} free")
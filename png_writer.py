@@ -0,0 +1,278 @@
+import math
+import os
+
+from logger import logger
+from svg_writer import SvgElement, SvgWriter
+
+
+def _to_float(value, reference=0.0) -> float:
+    """
+    Get the numeric value of an attribute, which can be a number, a string with units, or a
+    percentage of a reference length
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        if value.endswith('%'):
+            return float(value[:-1]) * reference / 100
+        if value.endswith('px'):
+            value = value[:-2]
+    return float(value)
+
+
+def _multiply(a, b):
+    return (a[0] * b[0] + a[2] * b[1],
+            a[1] * b[0] + a[3] * b[1],
+            a[0] * b[2] + a[2] * b[3],
+            a[1] * b[2] + a[3] * b[3],
+            a[0] * b[4] + a[2] * b[5] + a[4],
+            a[1] * b[4] + a[3] * b[5] + a[5])
+
+
+def _translation(tx, ty):
+    return 1, 0, 0, 1, tx, ty
+
+
+def _parse_transform(transform):
+    """
+    Get the affine matrix of a transform attribute, as made by `SvgElement.translate()` and
+    `SvgElement.rotate()`
+    """
+    matrix = _translation(0, 0)
+    for transformation in transform.split(')'):
+        if '(' not in transformation:
+            continue
+        name, arguments = transformation.split('(')
+        values = [float(value) for value in arguments.split(',') if value.strip()]
+        name = name.strip()
+
+        if name == 'translate':
+            step = _translation(values[0], values[1] if len(values) > 1 else 0)
+        elif name == 'rotate':
+            angle = math.radians(values[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            cx, cy = (values[1], values[2]) if len(values) > 2 else (0, 0)
+            step = (cos, sin, -sin, cos, cx - cos * cx + sin * cy, cy - sin * cx - cos * cy)
+        else:
+            logger.warning(f"Transformation '{name}' is not supported by raster outputs")
+            continue
+        matrix = _multiply(matrix, step)
+    return matrix
+
+
+class PngWriter(SvgWriter):
+    """
+    Streaming raster image writer, with the same interface as `SvgWriter`
+
+    Elements are made with the `SvgWriter` factories, but instead of being serialized they are
+    drawn into a pixel buffer as soon as they are added. Neither the SVG document nor its
+    elements are kept in memory, other than the declared symbols (see `<defs>`), so large maps
+    can be rasterized, and scaled down to thumbnails, directly.
+
+    Drawing is done with Pillow, an optional dependency only required for raster outputs
+    """
+    def __init__(self, filename, size, scale=1.0):
+        super().__init__(filename, size, validate=False)
+        self.scale = scale
+        self.width = _to_float(size[0])
+        self.height = _to_float(size[1])
+        self.size_px = (max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+        self.image = None
+        self.draw = None
+        self.fonts = {}
+        self.symbols = {}
+        self.transforms = []
+
+    def __enter__(self):
+        # pylint: disable=import-outside-toplevel
+        try:
+            from PIL import Image, ImageDraw
+        except ImportError:
+            logger.error("Pillow is required for raster outputs. Install it with "
+                         "'pip install pillow'")
+            raise SystemExit(-1)
+
+        self.image = Image.new('RGB', self.size_px, 'white')
+        # Drawing in RGBA mode blends translucent colors with what is already drawn
+        self.draw = ImageDraw.Draw(self.image, 'RGBA')
+        self.transforms = [(self.scale, 0, 0, self.scale, 0, 0)]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.image = None
+            return
+
+        self.temporary_filename = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            self.image.save(self.temporary_filename, format='PNG')
+            os.replace(self.temporary_filename, self.filename)
+        finally:
+            if os.path.exists(self.temporary_filename):
+                os.remove(self.temporary_filename)
+            self.image = None
+            self.draw = None
+
+    def add(self, element: SvgElement) -> SvgElement:
+        """
+        Draw an element, with all its children, inside the currently open group
+
+        :return: The added element
+        """
+        self._draw_element(element, self.transforms[-1])
+        return element
+
+    def start_group(self, group: SvgElement = None) -> SvgElement:
+        group = group if group is not None else self.g()
+        self.transforms.append(self._get_matrix(group, self.transforms[-1]))
+        return group
+
+    def end_group(self):
+        self.transforms.pop()
+
+    @staticmethod
+    def _get_matrix(element, matrix):
+        transform = element.attributes.get('transform')
+        return _multiply(matrix, _parse_transform(transform)) if transform else matrix
+
+    def _get_color(self, value, opacity=1.0):
+        # pylint: disable=import-outside-toplevel
+        from PIL import ImageColor
+
+        if value is None or value in ('none', 'transparent'):
+            return None
+        try:
+            color = ImageColor.getrgb(str(value))
+        except ValueError:
+            logger.warning(f"Color '{value}' is not supported by raster outputs")
+            return None
+        alpha = color[3] if len(color) == 4 else 255
+        return color[:3] + (round(alpha * opacity),)
+
+    def _get_font(self, size, family):
+        # pylint: disable=import-outside-toplevel
+        from PIL import ImageFont
+
+        key = (size, family)
+        font = self.fonts.get(key)
+        if font is None:
+            for name in (family, 'DejaVuSans.ttf', 'Arial.ttf'):
+                try:
+                    font = ImageFont.truetype(name, size)
+                    break
+                except (OSError, TypeError, AttributeError):
+                    continue
+            else:
+                try:
+                    font = ImageFont.load_default(size)
+                except TypeError:
+                    # Pillow older than 10.1 only has a fixed size bitmap default font
+                    font = ImageFont.load_default()
+            self.fonts[key] = font
+        return font
+
+    @staticmethod
+    def _transform(matrix, points):
+        return [(matrix[0] * x + matrix[2] * y + matrix[4],
+                 matrix[1] * x + matrix[3] * y + matrix[5]) for x, y in points]
+
+    def _get_stroke_width(self, attributes, matrix) -> int:
+        width = _to_float(attributes.get('stroke-width', 1) or 0)
+        if width <= 0:
+            return 0
+        # Strokes are always at least one pixel wide, so thin lines don't vanish on thumbnails
+        return max(1, round(width * math.hypot(matrix[0], matrix[1])))
+
+    def _draw_shape(self, points, attributes, matrix, closed):
+        opacity = _to_float(attributes.get('opacity', 1))
+        fill = self._get_color(attributes.get('fill', 'black'), opacity)
+        stroke = self._get_color(attributes.get('stroke'), opacity)
+        points = self._transform(matrix, points)
+
+        if fill is not None and len(points) > 2:
+            self.draw.polygon(points, fill=fill)
+
+        stroke_width = self._get_stroke_width(attributes, matrix)
+        if stroke is not None and stroke_width > 0 and len(points) > 1:
+            if closed:
+                points = points + points[:1]
+            self.draw.line(points, fill=stroke, width=stroke_width)
+
+    def _draw_text(self, element, matrix):
+        attributes = element.attributes
+        font_size = _to_float(attributes.get('font-size', 16)) * math.hypot(matrix[0], matrix[1])
+        # Text smaller than a pixel can't be read, so it is left out of thumbnails
+        if font_size < 1 or not element.text:
+            return
+
+        fill = self._get_color(attributes.get('fill', 'black'))
+        if fill is None:
+            return
+
+        horizontal = {'start': 'l', 'middle': 'm', 'end': 'r'}
+        vertical = {'middle': 'm', 'central': 'm', 'hanging': 't'}
+        anchor = horizontal.get(attributes.get('text-anchor'), 'l') + \
+            vertical.get(attributes.get('alignment-baseline'), 's')
+
+        stroke_width = self._get_stroke_width(
+            {'stroke-width': attributes.get('stroke-width', 0)}, matrix)
+        stroke = self._get_color(attributes.get('stroke')) if stroke_width > 0 else None
+
+        position = self._transform(matrix, [(_to_float(attributes.get('x', 0)),
+                                             _to_float(attributes.get('y', 0)))])[0]
+        # Text was escaped for the SVG output
+        text = element.text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+        self.draw.text(position, text,
+                       fill=fill,
+                       font=self._get_font(max(1, round(font_size)),
+                                           attributes.get('font-family')),
+                       anchor=anchor,
+                       stroke_width=stroke_width if stroke is not None else 0,
+                       stroke_fill=stroke)
+
+    def _draw_element(self, element: SvgElement, matrix):
+        name = element.name
+        attributes = element.attributes
+
+        if name == 'defs':
+            for symbol in element.elements:
+                if 'id' in symbol.attributes:
+                    self.symbols[symbol.attributes['id']] = symbol
+            return
+        if name == 'style':
+            return
+
+        matrix = self._get_matrix(element, matrix)
+
+        if name == 'g':
+            for child in element.elements:
+                self._draw_element(child, matrix)
+        elif name == 'use':
+            symbol = self.symbols.get(attributes['xlink:href'].lstrip('#'))
+            if symbol is not None:
+                self._draw_element(symbol, _multiply(matrix, _translation(
+                    _to_float(attributes.get('x', 0)), _to_float(attributes.get('y', 0)))))
+        elif name == 'rect':
+            x = _to_float(attributes['x'], self.width)
+            y = _to_float(attributes['y'], self.height)
+            width = _to_float(attributes['width'], self.width)
+            height = _to_float(attributes['height'], self.height)
+            self._draw_shape([(x, y), (x + width, y), (x + width, y + height), (x, y + height)],
+                             attributes, matrix, closed=True)
+        elif name == 'circle':
+            cx, cy = self._transform(matrix, [(_to_float(attributes['cx']),
+                                               _to_float(attributes['cy']))])[0]
+            r = _to_float(attributes['r']) * math.hypot(matrix[0], matrix[1])
+            self.draw.ellipse((cx - r, cy - r, cx + r, cy + r),
+                              fill=self._get_color(attributes.get('fill', 'black')))
+        elif name == 'line':
+            points = [(_to_float(attributes['x1']), _to_float(attributes['y1'])),
+                      (_to_float(attributes['x2']), _to_float(attributes['y2']))]
+            self._draw_shape(points, dict(attributes, fill='none'), matrix, closed=False)
+        elif name == 'polyline':
+            points = [tuple(float(value) for value in point.split(','))
+                      for point in attributes['points'].split()]
+            self._draw_shape(points, attributes, matrix, closed=False)
+        elif name == 'text':
+            self._draw_text(element, matrix)
+        else:
+            logger.warning(f"Element '{name}' is not supported by raster outputs")
@@ -1,11 +1,86 @@
+from logger import logger
 from style import Style
 
 
+class SectionFlags:
+    """
+    Bit values for the flags a section can be marked with
+    """
+    GROWS_UP = 1 << 0
+    GROWS_DOWN = 1 << 1
+    BREAK = 1 << 2
+    HIDDEN = 1 << 3
+
+    NAMES = {
+        'grows-up': GROWS_UP,
+        'grows-down': GROWS_DOWN,
+        'break': BREAK,
+        'hidden': HIDDEN,
+    }
+
+    @staticmethod
+    def from_names(flags) -> int:
+        """
+        Convert flags as specified at map or configuration files to their bit representation
+
+        :param flags: Flags as a bit mask, a list of names or a string with comma or space
+                      separated names
+        :return: Bit mask with the flags
+        """
+        if isinstance(flags, int):
+            return flags
+
+        if flags is None:
+            return 0
+
+        names = flags.split(',') if isinstance(flags, str) else flags
+
+        bits = 0
+        for name in names:
+            for token in str(name).replace(',', ' ').split():
+                if token in SectionFlags.NAMES:
+                    bits |= SectionFlags.NAMES[token]
+                else:
+                    logger.warning(f"Unknown section flag '{token}' has been ignored")
+        return bits
+
+    @staticmethod
+    def to_names(bits: int) -> [str]:
+        """
+        Convert the bit representation of flags to a list of flag names
+
+        :param bits: Bit mask with the flags
+        :return: List with the names of the flags
+        """
+        return [name for name, bit in SectionFlags.NAMES.items() if bits & bit]
+
+
+# Style of sections not assigned to any area yet. Shared by all of them, so never modify it
+_UNASSIGNED_STYLE = Style()
+
+
 class Section:
     """
     Holds logical and graphical information for a given section, as well as other properties such as
     style, visibility, type, etc...
+
+    Besides areas (output sections) and sections (input sections), parsed maps hold entries that
+    are part of the map model but are not drawn (see `NOT_DRAWN_TYPES`): memory regions, fills
+    and symbols. `lma` is the load address, only set when it differs from the address, and
+    `origin` the object or archive member the section or symbol comes from
+
+    Maps can hold hundreds of thousands of sections, so instances are kept compact: attributes
+    are slots, flags are stored as a bit mask and style is shared by reference until it is
+    replaced
     """
+    __slots__ = ('type', 'parent', 'size', 'address', 'id', 'name', 'size_x', 'size_y',
+                 'pos_x', 'pos_y', 'style', 'flag_bits', 'lma', 'origin')
+
+    NOT_DRAWN_TYPES = ('region', 'fill', 'symbol')
+    # Id of the blocks aggregating sections too small to be seen. Section names never hold a null
+    # character, so it can't match the id of a real section, nor any rule or link
+    MERGED_ID = '\0merged'
+
     size: int
     address: int
     id: str
@@ -13,10 +88,12 @@ class Section:
     size_y: int
     pos_x: int
     pos_y: int
-    label_offset: int = 10
+    label_offset = 10
     style: Style
+    flag_bits: int
 
-    def __init__(self, size, address, id, _type, parent, flags=[], name=None):
+    def __init__(self, size, address, id, _type, parent, flags=0, name=None, lma=None,
+                 origin=None):
         self.type = _type
         self.parent = parent
         self.size = size
@@ -25,20 +102,70 @@ class Section:
         self.name = name
         self.size_y = 0
         self.size_x = 0
-        self.style = Style()
-        self.flags = flags
+        self.pos_x = 0
+        self.pos_y = 0
+        self.style = _UNASSIGNED_STYLE
+        self.flag_bits = SectionFlags.from_names(flags)
+        self.lma = lma
+        self.origin = origin
+
+    @property
+    def flags(self) -> [str]:
+        return SectionFlags.to_names(self.flag_bits)
+
+    def add_flags(self, flags):
+        """
+        Mark the section with additional flags, keeping the ones it already had
+
+        :param flags: Flags as a bit mask, a list of names or a string with comma or space
+                      separated names
+        """
+        self.flag_bits |= SectionFlags.from_names(flags)
+
+    def view(self):
+        """
+        Get a lightweight copy of the section, to be used by a single area
+
+        Position and size in pixels are set independently for each view, while style is shared
+        with the original section until it is replaced at the view
+
+        :return: A shallow copy of the section
+        """
+        view = Section.__new__(Section)
+        view.type = self.type
+        view.parent = self.parent
+        view.size = self.size
+        view.address = self.address
+        view.id = self.id
+        view.name = self.name
+        view.size_x = self.size_x
+        view.size_y = self.size_y
+        view.pos_x = self.pos_x
+        view.pos_y = self.pos_y
+        view.style = self.style
+        view.flag_bits = self.flag_bits
+        view.lma = self.lma
+        view.origin = self.origin
+        return view
+
+    def has_own_style(self) -> bool:
+        """
+        Whether the section was given a style of its own, such as the ones of map differences,
+        which is applied over the style of the area it is drawn at
+        """
+        return self.style is not _UNASSIGNED_STYLE
 
     def is_grow_up(self):
-        return 'grows-up' in self.flags
+        return bool(self.flag_bits & SectionFlags.GROWS_UP)
 
     def is_grow_down(self):
-        return 'grows-down' in self.flags
+        return bool(self.flag_bits & SectionFlags.GROWS_DOWN)
 
     def is_break(self):
-        return 'break' in self.flags
+        return bool(self.flag_bits & SectionFlags.BREAK)
 
     def is_hidden(self):
-        return 'hidden' in self.flags
+        return bool(self.flag_bits & SectionFlags.HIDDEN)
 
     def _should_element_be_hidden(self, attribute):
         return True if str(attribute) in ['True', 'yes'] \
@@ -0,0 +1,84 @@
+import fnmatch
+import re
+
+from helpers import safe_element_dict_get
+from logger import logger
+
+
+class SectionRules:
+    """
+    Section override rules of an area (`sections` property), compiled to be looked up by name
+
+    Rule names can be exact section names, glob patterns such as `.text.*` or `USART?`, or
+    regular expressions prefixed with `re:`, such as `re:USART[12]`. Patterns must match the
+    whole section name. Exact names are indexed in a dictionary, and all patterns are compiled
+    into a single expression, so finding the rules of a section costs a single lookup and at
+    most a single match, no matter how many rules are there
+    """
+    REGEX_PREFIX = 're:'
+    GLOB_CHARACTERS = ('*', '?', '[')
+
+    def __init__(self, rules):
+        self.rules = rules if rules is not None else []
+        self.rules_by_name = {}
+        self.patterns = []
+        self.patterns_matcher = None
+
+        names_without_value = False
+
+        for position, rule in enumerate(self.rules):
+            names = safe_element_dict_get(rule, 'names', [])
+
+            if names is None:
+                names_without_value = True
+                names = []
+            elif isinstance(names, str):
+                names = [names]
+
+            for name in names:
+                pattern = self._get_pattern(name) if isinstance(name, str) else None
+                if pattern is not None:
+                    self.patterns.append((re.compile(pattern), position))
+                    continue
+
+                positions = self.rules_by_name.setdefault(name, [])
+                if len(positions) == 0 or positions[-1] != position:
+                    positions.append(position)
+
+        if names_without_value:
+            logger.warning(
+                "'sections' property is declared but is empty. Field has been ignored")
+
+        if len(self.patterns) > 0:
+            self.patterns_matcher = re.compile(
+                '|'.join(f'(?:{pattern.pattern})' for pattern, _ in self.patterns))
+
+    def _get_pattern(self, name):
+        """
+        Get the regular expression for a rule name, if it is a pattern
+
+        :param name: Name as written at the configuration file
+        :return: Regular expression matching the whole section name, or None for exact names
+        """
+        if name.startswith(self.REGEX_PREFIX):
+            return f'(?:{name[len(self.REGEX_PREFIX):]})\\Z'
+        if any(character in name for character in self.GLOB_CHARACTERS):
+            return fnmatch.translate(name)
+        return None
+
+    def get_rules(self, name) -> []:
+        """
+        Get the rules that apply to a section, in the order they were declared
+
+        :param name: Section name (id)
+        :return: List of rules whose names match the section one
+        """
+        positions = self.rules_by_name.get(name, [])
+
+        if self.patterns_matcher is not None and self.patterns_matcher.match(str(name)):
+            positions = set(positions)
+            positions.update(position for pattern, position in self.patterns
+                             if pattern.match(str(name)))
+            positions = sorted(positions)
+
+        return [self.rules[position] for position in positions]
@@ -1,45 +1,162 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
 from section import Section
 
 
+class _SectionsIndex:
+    """
+    Sorted views of a list of sections, allowing address queries in logarithmic time
+
+    Sections are indexed by their position at the original list, so results can be given back in
+    their original order
+    """
+    def __init__(self, sections: [Section]):
+        starts = [section.address for section in sections]
+        self.by_start = sorted(range(len(sections)), key=starts.__getitem__)
+        self.starts = [starts[i] for i in self.by_start]
+
+        ends = [section.address + section.size for section in sections]
+        self.by_end = sorted(range(len(sections)), key=ends.__getitem__)
+        self.ends = [ends[i] for i in self.by_end]
+
+        # Highest end address among all sections starting at or before a given one. Used to know
+        # whether any section before a given start address still covers a given address
+        self.max_end_up_to = list(accumulate((ends[i] for i in self.by_start), max))
+
+        self._sections = sections
+        self._positions_by_id = None
+
+    @property
+    def positions_by_id(self) -> {}:
+        if self._positions_by_id is None:
+            self._positions_by_id = {}
+            for i, section in enumerate(self._sections):
+                self._positions_by_id.setdefault(section.id, []).append(i)
+        return self._positions_by_id
+
+
 class Sections:
     """
     Provide methods and to select and filter sections according to their base address, size, parent,
     type,...
+
+    Address related queries are answered through an index that is lazily built on the first query.
+    Whoever modifies the address or size of the contained sections must call `invalidate_index()`
     """
     sections: [Section] = []
 
     def __init__(self, sections: [Section]):
         self.sections = sections
+        self._index = None
+        self._drawn = None
 
     def get_sections(self) -> [Section]:
         return self.sections
 
+    def get_drawn(self):
+        """
+        Get the sections that are drawn at diagrams, leaving out memory regions, fills and
+        symbols (see `Section.NOT_DRAWN_TYPES`)
+
+        :return: This same object if all its sections are drawn, a new Sections object otherwise
+        """
+        if self._drawn is None:
+            drawn = [section for section in self.sections
+                     if section.type not in Section.NOT_DRAWN_TYPES]
+            self._drawn = self if len(drawn) == len(self.sections) else Sections(drawn)
+        return self._drawn
+
+    def invalidate_index(self):
+        """
+        Discard the address index, so it gets rebuilt on next query. Must be called after
+        modifying the address or size of any of the contained sections
+        """
+        self._index = None
+
+    @property
+    def index(self) -> _SectionsIndex:
+        if self._index is None:
+            self._index = _SectionsIndex(self.sections)
+        return self._index
+
+    def _from_positions(self, positions):
+        """
+        Get a new Sections object with the sections at the given positions, keeping their order
+
+        :param positions: Positions of the sections at the current list
+        :return: A new Sections object
+        """
+        if len(positions) == len(self.sections):
+            return self._copy()
+        return Sections([self.sections[i] for i in sorted(positions)])
+
+    def _copy(self):
+        """
+        Get a new Sections object with the same sections, sharing the already built index
+        """
+        sections = Sections(self.sections)
+        sections._index = self._index
+        return sections
+
     @property
-    def highest_section(self) -> int:
-        return max(self.sections, key=lambda x: x.address)
+    def highest_section(self) -> Section:
+        index = self.index
+        # Among sections sharing the highest address, get the first one in the original order
+        return self.sections[index.by_start[bisect_left(index.starts, index.starts[-1])]]
 
     @property
     def highest_address(self) -> int:
-        return max(self.sections, key=lambda x: x.address).address
+        return self.index.starts[-1]
 
     @property
     def highest_memory(self) -> int:
-        section = max(self.sections, key=lambda x: x.address + x.size)
-        return section.address + section.size
+        return self.index.ends[-1]
 
     @property
     def lowest_memory(self) -> int:
-        return min(self.sections, key=lambda x: x.address).address
+        return self.index.starts[0]
 
     @property
     def lowest_size(self) -> int:
         return min(self.sections, key=lambda x: x.size).size
 
     def has_address(self, address: int) -> bool:
-        for section in self.sections:
-            if section.address <= address <= (section.address + section.size):
-                return True
-        return False
+        index = self.index
+        last_starting_before = bisect_right(index.starts, address) - 1
+        return last_starting_before >= 0 and index.max_end_up_to[last_starting_before] >= address
+
+    def find_sections_containing(self, address: int):
+        """
+        Get the sections that contain a given address, being their end address inclusive
+
+        :param address: Address to look for
+        :return: A Sections object with the sections containing the address
+        """
+        index = self.index
+        positions = []
+
+        i = bisect_right(index.starts, address) - 1
+        while i >= 0 and index.max_end_up_to[i] >= address:
+            section = self.sections[index.by_start[i]]
+            if section.address + section.size >= address:
+                positions.append(index.by_start[i])
+            i -= 1
+
+        return Sections([self.sections[i] for i in sorted(positions)])
+
+    def find_by_ids(self, ids: [str]) -> [Section]:
+        """
+        Get all the sections having any of the given ids, in their original order
+
+        :param ids: Ids of the sections to look for
+        :return: List of sections with any of the given ids
+        """
+        positions_by_id = self.index.positions_by_id
+        positions = set()
+        for _id in ids:
+            positions.update(positions_by_id.get(_id, []))
+        return [self.sections[i] for i in sorted(positions)]
 
     def is_break_section_group(self):
         for section in self.get_sections():
@@ -48,21 +165,48 @@ class Sections:
         return False
 
     def filter_size_min(self, size_bytes: int):
-        return Sections(self.sections) if size_bytes is None \
-            else Sections(list(filter(lambda item: item.size > size_bytes, self.sections)))
+        return self._copy() if size_bytes is None \
+            else Sections([item for item in self.sections if item.size > size_bytes])
 
     def filter_size_max(self, size_bytes: int):
-        return Sections(self.sections) if size_bytes is None \
-            else Sections(list(filter(lambda item: item.size < size_bytes, self.sections)))
+        return self._copy() if size_bytes is None \
+            else Sections([item for item in self.sections if item.size < size_bytes])
 
     def filter_address_max(self, address_bytes: int):
-        return Sections(self.sections) if address_bytes is None \
-            else Sections(list(filter(lambda item: (item.address + item.size)
-                                                   <= address_bytes, self.sections)))
+        if address_bytes is None:
+            return self._copy()
+        index = self.index
+        return self._from_positions(index.by_end[:bisect_right(index.ends, address_bytes)])
 
     def filter_address_min(self, address_bytes: int):
-        return Sections(self.sections) if address_bytes is None \
-            else Sections(list(filter(lambda item: item.address >= address_bytes, self.sections)))
+        if address_bytes is None:
+            return self._copy()
+        index = self.index
+        return self._from_positions(index.by_start[bisect_left(index.starts, address_bytes):])
+
+    def filter_address_range(self, min_address_bytes: int, max_address_bytes: int):
+        """
+        Get the sections starting at or after a minimum address and ending at or before a
+        maximum one. Equivalent to chaining `filter_address_min` and `filter_address_max`, but
+        only looks at the sections starting within the range
+
+        :param min_address_bytes: Minimum start address, None for no limit
+        :param max_address_bytes: Maximum end address, None for no limit
+        :return: A new Sections object with the sections within the range
+        """
+        if max_address_bytes is None:
+            return self.filter_address_min(min_address_bytes)
+        if min_address_bytes is None:
+            return self.filter_address_max(max_address_bytes)
+
+        index = self.index
+        first = bisect_left(index.starts, min_address_bytes)
+        last = bisect_right(index.starts, max_address_bytes)
+
+        positions = [i for i in index.by_start[first:last]
+                     if self.sections[i].address + self.sections[i].size <= max_address_bytes]
+
+        return self._from_positions(positions)
 
     def filter_type(self, _type: str):
         return Sections(self.sections) if _type is None \
@@ -91,9 +235,7 @@ class Sections:
             # Section that covers from previous break till start of this break
             # If it was the first break, will cover from begining of the whole area to this break.
             # Only append if search returns more than 0 counts
-            s = Sections(sections=self.sections) \
-                .filter_address_max(_break.address) \
-                .filter_address_min(previous_break_end_address)
+            s = self.filter_address_range(previous_break_end_address, _break.address)
             if len(s.get_sections()) > 0:
                 split_sections.append(s)
 
@@ -103,9 +245,7 @@ class Sections:
 
         # Section that covers from the last break end address to the end of the whole area. Only
         # append if search returns more than 0 counts
-        last_group = Sections(sections=self.sections) \
-            .filter_address_max(self.highest_memory) \
-            .filter_address_min(previous_break_end_address)
+        last_group = self.filter_address_range(previous_break_end_address, self.highest_memory)
 
         if len(last_group.sections) > 0:
             split_sections.append(last_group)
@@ -1,6 +1,12 @@
+from weakref import WeakValueDictionary
+
+
 class Style:
     """
     Holds style for different rendering objects
+
+    Styles are resolved once along the document, area and section cascade by `derive()`, which
+    gives shared immutable instances: sections with the same effective style share one instance
     """
     # Non SVG
     background: str
@@ -30,11 +36,39 @@ class Style:
 
     weight: int
 
+    # Interned immutable styles, by their properties. Values are weak, so styles no section or
+    # configuration uses anymore, such as the ones of a configuration edited in watch mode or of
+    # a configuration passed to `render()` by a long-running service, are freed
+    _interned = WeakValueDictionary()
+
     def __init__(self, style=None):
         if style is not None:
             for key, value in style.items():
                 setattr(self, key.replace('-', '_'), style.get(key, value))
 
+    def __setattr__(self, key, value):
+        if self.__dict__.get('_frozen', False):
+            raise AttributeError("Style is immutable, use `derive()` to get a modified style")
+        super().__setattr__(key, value)
+
+    def __copy__(self):
+        return self if self.is_frozen() else Style(self.get_properties())
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def is_frozen(self) -> bool:
+        return self.__dict__.get('_frozen', False)
+
+    def get_properties(self) -> {}:
+        """
+        Get the properties defined at this style
+
+        :return: Dictionary with the non-None properties, using underscores in their names
+        """
+        return {key: value for key, value in self.__dict__.items()
+                if not key.startswith('_') and value is not None}
+
     def override_properties_from(self, style):
         """
         Modify self by adding additional members available at the provided style
@@ -42,51 +76,109 @@ class Style:
         :param style: Style whose members wants to be added
         :return: New merged styl
         """
-        members = [attr for attr in dir(style) if
-                   not callable(getattr(style, attr)) and not attr.startswith("__") and getattr(
-                       style, attr) is not None]
-
-        for member in members:
-            value = getattr(style, member)
+        for member, value in style.get_properties().items():
             setattr(self, member, value)
 
         return self
 
     @staticmethod
-    def get_default():
+    def intern(properties: {}):
         """
-        Get an initialized default Style instance
-        :return: A default initialized Style instance
+        Get the immutable style with the given properties
+
+        Styles with the very same properties are a single shared instance, so they can be
+        compared by identity and rendered only once
+
+        :param properties: Dictionary with the style properties, using underscores in their names
+        :return: Shared immutable style
+        """
+        try:
+            key = tuple(sorted(properties.items()))
+            style = Style._interned.get(key)
+        except TypeError:
+            # Unhashable property values, such as lists, can't be shared
+            key = None
+            style = None
+
+        if style is None:
+            style = Style(properties)
+            # Derivations are only kept while the derived style is used elsewhere, too
+            style.__dict__['_derived'] = WeakValueDictionary()
+            style.__dict__['_frozen'] = True
+            if key is not None:
+                Style._interned[key] = style
+
+        return style
+
+    def derive(self, overrides=None):
         """
+        Get the immutable style resulting from overriding some properties of this style
+
+        Results are memoized, so deriving the same overrides again is a single lookup
+
+        :param overrides: Properties to override, either as a Style or as a dictionary coming
+                          from the configuration file. None values are ignored
+        :return: Shared immutable style
+        """
+        if isinstance(overrides, Style):
+            overrides = overrides.get_properties()
+        elif overrides is not None:
+            overrides = {key.replace('-', '_'): value for key, value in overrides.items()
+                         if value is not None}
+
+        if not overrides:
+            return self if self.is_frozen() else Style.intern(self.get_properties())
+
+        if not self.is_frozen():
+            return Style.intern({**self.get_properties(), **overrides})
 
-        default_style = Style()
-        default_style.break_type = '≈'
-        default_style.break_size = 20
+        try:
+            key = tuple(sorted(overrides.items()))
+            derived = self._derived.get(key)
+        except TypeError:
+            key = None
+            derived = None
+
+        if derived is None:
+            derived = Style.intern({**self.get_properties(), **overrides})
+            if key is not None:
+                self._derived[key] = derived
+
+        return derived
+
+    @staticmethod
+    def get_default():
+        """
+        Get the default style
+        :return: A shared, immutable, default Style instance
+        """
 
-        default_style.growth_arrow_size = 1
+        return Style.intern({
+            'break_type': '≈',
+            'break_size': 20,
 
-        default_style.background = 'white'
-        default_style.stroke = 'black'
-        default_style.stroke_width = 1
-        default_style.size = 2
+            'growth_arrow_size': 1,
 
-        default_style.font_size = 16
-        default_style.font_type = 'Helvetica'
+            'background': 'white',
+            'stroke': 'black',
+            'stroke_width': 1,
+            'size': 2,
 
-        default_style.weight = 1
-        default_style.opacity = 1
+            'font_size': 16,
+            'font_type': 'Helvetica',
 
-        default_style.text_stroke = 'black'
-        default_style.text_fill = 'black'
-        default_style.text_stroke_width = 0
+            'opacity': 1,
 
-        default_style.fill = 'lightgrey'
-        default_style.growth_arrow_fill = 'white'
-        default_style.growth_arrow_stroke = 'black'
-        default_style.stroke_dasharray = '3,2'
-        default_style.weight = 2
-        default_style.hide_size = 'auto'
-        default_style.hide_name = 'auto'
-        default_style.hide_address = 'auto'
+            'text_stroke': 'black',
+            'text_fill': 'black',
+            'text_stroke_width': 0,
 
-        return default_style
+            'fill': 'lightgrey',
+            'growth_arrow_fill': 'white',
+            'growth_arrow_stroke': 'black',
+            'stroke_dasharray': '3,2',
+            'weight': 2,
+            'hide_size': 'auto',
+            'hide_name': 'auto',
+            'hide_address': 'auto',
+        })
@@ -0,0 +1,283 @@
+import os
+
+
+def _escape_text(text: str) -> str:
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _escape_attribute(text: str) -> str:
+    text = _escape_text(text)
+    if '"' in text:
+        text = text.replace('"', '&quot;')
+    if '\r' in text:
+        text = text.replace('\r', '&#13;')
+    if '\n' in text:
+        text = text.replace('\n', '&#10;')
+    if '\t' in text:
+        text = text.replace('\t', '&#09;')
+    return text
+
+
+def _join(values, separator=','):
+    """
+    Join values into an attribute value, leaving None values out and flattening nested ones
+    """
+    strings = []
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            strings.append(_join(value, separator))
+        elif value is not None:
+            strings.append(str(value))
+    return separator.join(strings)
+
+
+class SvgElement:
+    """
+    A SVG element, with its attributes, text and child elements
+
+    Mirrors the subset of the svgwrite element interface used by the renderer, and is serialized
+    exactly as svgwrite would do: attributes in alphabetical order, numbers formatted with `str()`
+    and empty or None valued attributes left out
+    """
+    __slots__ = ('name', 'attributes', 'text', 'elements', 'writer')
+
+    def __init__(self, writer, name, attributes, text=None):
+        self.writer = writer
+        self.name = name
+        self.attributes = {}
+        self.text = text
+        self.elements = []
+        for key, value in attributes.items():
+            self[key.rstrip('_').replace('_', '-')] = value
+
+    def __setitem__(self, key, value):
+        if self.writer.validator is not None:
+            self.writer.validator.check_svg_attribute_value(self.name, key, value)
+        self.attributes[key] = value
+
+    def add(self, element):
+        """
+        Add a child element
+
+        :return: The added element
+        """
+        if self.writer.validator is not None:
+            self.writer.validator.check_valid_children(self.name, element.name)
+        self.elements.append(element)
+        return element
+
+    def _add_transformation(self, transformation):
+        previous = self.attributes.get('transform', '')
+        self['transform'] = f"{previous} {transformation}".strip()
+
+    def translate(self, tx, ty=None):
+        self._add_transformation(f"translate({_join([tx, ty])})")
+
+    def rotate(self, angle, center=None):
+        self._add_transformation(f"rotate({_join([angle, center])})")
+
+    def get_start_tag(self) -> str:
+        attributes = []
+        for key, value in sorted(self.attributes.items()):
+            if value is None:
+                continue
+            value = str(value)
+            if value:
+                attributes.append(f' {key}="{_escape_attribute(value)}"')
+        return f"<{self.name}{''.join(attributes)}"
+
+    def serialize(self, strings: []):
+        """
+        Append the SVG representation of this element and its children to a list of strings
+        """
+        strings.append(self.get_start_tag())
+        if self.text or self.elements:
+            strings.append('>')
+            if self.text:
+                strings.append(self.text)
+            for element in self.elements:
+                element.serialize(strings)
+            strings.append(f"</{self.name}>")
+        else:
+            strings.append(' />')
+
+
+class SvgWriter:
+    """
+    Streaming SVG document writer
+
+    Instead of building the whole document tree in memory and serializing it at the end, every
+    element added to the document (see `add()`) is written to the output file right away, and
+    groups can be opened and closed around the elements they contain (see `start_group()`). The
+    output is written to a temporary file, which atomically replaces the output file once the
+    document is complete.
+
+    Element factories mirror those of `svgwrite.Drawing`, and the output is byte compatible
+    with it. Attribute values are validated with svgwrite for the SVG full profile, unless
+    validation is disabled
+    """
+    def __init__(self, filename, size, validate=True):
+        self.filename = filename
+        self.size = size
+        self.file = None
+        self.temporary_filename = None
+        self.open_groups = []
+        # Start tag of the last opened group, only written once it gets its first element, as
+        # groups without elements are written as empty elements
+        self.pending_start_tag = None
+
+        self.validator = None
+        if validate:
+            # pylint: disable=import-outside-toplevel
+            from svgwrite.validator2 import get_validator
+            self.validator = get_validator('full', debug=True)
+
+    def __enter__(self):
+        self.temporary_filename = f"{self.filename}.{os.getpid()}.tmp"
+        self.file = open(self.temporary_filename, 'w', encoding='utf-8')
+
+        root = SvgElement(self, 'svg', {'width': self.size[0], 'height': self.size[1]})
+        root.attributes.update({'xmlns': "http://www.w3.org/2000/svg",
+                                'xmlns:xlink': "http://www.w3.org/1999/xlink",
+                                'xmlns:ev': "http://www.w3.org/2001/xml-events",
+                                'baseProfile': 'full',
+                                'version': '1.1'})
+
+        self.file.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        self.file.write(root.get_start_tag() + '>')
+        self.file.write('<defs />')
+        self.open_groups = [root]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                while len(self.open_groups) > 0:
+                    self.end_group()
+            self.file.close()
+            if exc_type is None:
+                os.replace(self.temporary_filename, self.filename)
+        finally:
+            if os.path.exists(self.temporary_filename):
+                os.remove(self.temporary_filename)
+            self.file = None
+
+    def add(self, element: SvgElement) -> SvgElement:
+        """
+        Write an element, with all its children, inside the currently open group
+
+        :return: The added element
+        """
+        if self.validator is not None:
+            self.validator.check_valid_children(self.open_groups[-1].name, element.name)
+        strings = []
+        self._write_pending_start_tag(strings)
+        element.serialize(strings)
+        self.file.write(''.join(strings))
+        return element
+
+    def add_serialized(self, text: str):
+        """
+        Write an already serialized element inside the currently open group
+        """
+        strings = []
+        self._write_pending_start_tag(strings)
+        strings.append(text)
+        self.file.write(''.join(strings))
+
+    def _write_pending_start_tag(self, strings):
+        if self.pending_start_tag is not None:
+            strings.append(self.pending_start_tag + '>')
+            self.pending_start_tag = None
+
+    def start_group(self, group: SvgElement = None) -> SvgElement:
+        """
+        Open a group, so that the elements added from now on are written inside it
+
+        :param group: Group element, with its attributes already set. If not provided, a group
+                      without attributes is opened
+        :return: The opened group
+        """
+        group = group if group is not None else self.g()
+        if self.validator is not None:
+            self.validator.check_valid_children(self.open_groups[-1].name, group.name)
+        strings = []
+        self._write_pending_start_tag(strings)
+        self.file.write(''.join(strings))
+        self.pending_start_tag = group.get_start_tag()
+        self.open_groups.append(group)
+        return group
+
+    def end_group(self):
+        """
+        Close the last opened group
+        """
+        group = self.open_groups.pop()
+        if self.pending_start_tag is not None:
+            self.file.write(self.pending_start_tag + ' />')
+            self.pending_start_tag = None
+        else:
+            self.file.write(f"</{group.name}>")
+
+    def g(self, **extra) -> SvgElement:
+        return SvgElement(self, 'g', extra)
+
+    def rect(self, insert=(0, 0), size=(1, 1), rx=None, ry=None, **extra) -> SvgElement:
+        element = SvgElement(self, 'rect', extra)
+        element['x'], element['y'] = insert
+        element['width'], element['height'] = size
+        if rx is not None:
+            element['rx'] = rx
+        if ry is not None:
+            element['ry'] = ry
+        return element
+
+    def circle(self, center=(0, 0), r=1, **extra) -> SvgElement:
+        element = SvgElement(self, 'circle', extra)
+        element['cx'], element['cy'] = center
+        element['r'] = r
+        return element
+
+    def line(self, start=(0, 0), end=(0, 0), **extra) -> SvgElement:
+        element = SvgElement(self, 'line', extra)
+        element['x1'], element['y1'] = start
+        element['x2'], element['y2'] = end
+        return element
+
+    def polyline(self, points=(), **extra) -> SvgElement:
+        element = SvgElement(self, 'polyline', extra)
+        if self.validator is not None:
+            for x, y in points:
+                self.validator.check_svg_type(x, 'coordinate')
+                self.validator.check_svg_type(y, 'coordinate')
+        element.attributes['points'] = ' '.join(f"{x},{y}" for x, y in points)
+        return element
+
+    def text(self, text, insert=None, **extra) -> SvgElement:
+        element = SvgElement(self, 'text', extra, text=_escape_text(str(text)))
+        if insert is not None:
+            element['x'] = str(insert[0])
+            element['y'] = str(insert[1])
+        return element
+
+    def use(self, href, insert=None, **extra) -> SvgElement:
+        element = SvgElement(self, 'use', extra)
+        element['xlink:href'] = href
+        if insert is not None:
+            element['x'], element['y'] = insert
+        return element
+
+    def style(self, content='') -> SvgElement:
+        element = SvgElement(self, 'style', {'type': 'text/css'})
+        if content:
+            element.text = f"<![CDATA[{content}]]>"
+        return element
+
+    def defs(self) -> SvgElement:
+        return SvgElement(self, 'defs', {})
@@ -0,0 +1,156 @@
+import os
+import time
+
+from linkerscope import load_config, load_map, render
+from logger import logger
+from sections import Sections
+
+
+class AreaViewCache:
+    """
+    Area views of the last drawing, reused as long as neither their configuration nor the
+    sections they show change
+    """
+    def __init__(self):
+        self.entries = []
+        self.next_entries = []
+        self.built = 0
+        self.reused = 0
+
+    @staticmethod
+    def _same_sections(sections, other_sections) -> bool:
+        if len(sections) != len(other_sections):
+            return False
+        return all(section is other or
+                   (section.id, section.address, section.size, section.type, section.parent,
+                    section.name, section.flag_bits) ==
+                   (other.id, other.address, other.size, other.type, other.parent,
+                    other.name, other.flag_bits)
+                   for section, other in zip(sections, other_sections))
+
+    def get_area_view(self, area, sections: Sections):
+        """
+        Get the view of an area, reusing the one of the last drawing if nothing changed
+
+        :param area: Area configuration
+        :param sections: Sections shown by the area
+        :return: Area view
+        """
+        for area_config, style, previous_sections, area_view in self.entries:
+            # Styles are shared immutable instances, so equal styles are the same object
+            if style is area.style and area_config == area.area_config and \
+                    self._same_sections(previous_sections, sections.get_sections()):
+                self.reused += 1
+                break
+        else:
+            area_view = area.make_area_view(sections)
+            self.built += 1
+
+        self.next_entries.append((area.area_config, area.style, sections.get_sections(), area_view))
+        return area_view
+
+    def start(self):
+        """
+        Start a new drawing. Only the area views used by the previous one are kept
+        """
+        self.entries = self.next_entries
+        self.next_entries = []
+        self.built = 0
+        self.reused = 0
+
+
+class Watcher:
+    """
+    Watches a map file and, optionally, a configuration file, and draws the diagram again every
+    time any of them changes
+
+    Files are polled for changes of their modification time or size. Only the changed file is
+    loaded again, and only the areas whose configuration or sections changed are rebuilt
+    """
+    def __init__(self, map_filename, config_filename, output, interval=0.2, use_cache=True,
+                 **render_options):
+        self.map_filename = map_filename
+        self.config_filename = config_filename
+        self.output = output
+        self.interval = interval
+        self.render_options = render_options
+        self.use_cache = use_cache
+
+        # Status of the files when they were last loaded. Never loaded files don't match any
+        self.map_stat = -1
+        self.config_stat = -1
+        self.sections = None
+        self.configuration = None
+        self.cache = AreaViewCache()
+
+    @staticmethod
+    def _stat(filename):
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def update(self) -> bool:
+        """
+        Load the files that changed since last update, and draw the diagram again if any did
+
+        If any of the files can't be loaded, as it could happen while it is still being written,
+        the diagram is not drawn, and loading is tried again on next update
+
+        :return: True if the diagram was drawn
+        """
+        start = time.perf_counter()
+        changes = []
+
+        map_stat = self._stat(self.map_filename)
+        if map_stat != self.map_stat:
+            # Even if loading fails, wait for another change before trying again
+            self.map_stat = map_stat
+            try:
+                self.sections = load_map(self.map_filename, use_cache=self.use_cache,
+                                         jobs=self.render_options.get('jobs', 1))
+            except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+                logger.error(f"Couldn't load '{self.map_filename}': {error}")
+                return False
+            changes.append(self.map_filename)
+
+        config_stat = self._stat(self.config_filename) if self.config_filename else None
+        if config_stat != self.config_stat:
+            self.config_stat = config_stat
+            try:
+                self.configuration = load_config(self.config_filename)
+            except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+                logger.error(f"Couldn't load '{self.config_filename}': {error}")
+                return False
+            changes.append(self.config_filename or 'default configuration')
+
+        if len(changes) == 0:
+            return False
+
+        self.cache.start()
+        try:
+            render(self.sections, self.configuration, self.output, area_view_cache=self.cache,
+                   **self.render_options)
+        except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+            logger.error(f"Couldn't draw '{self.output}': {error}")
+            return False
+
+        logger.info(f"'{self.output}' updated in {time.perf_counter() - start:.3f} s after "
+                    f"changes at {', '.join(changes)}: {self.cache.built} areas rebuilt, "
+                    f"{self.cache.reused} reused")
+        return True
+
+    def run(self):
+        """
+        Draw the diagram, and then keep drawing it again on every change, until interrupted
+        """
+        logger.info(f"Watching '{self.map_filename}'" +
+                    (f" and '{self.config_filename}'" if self.config_filename else '') +
+                    ". Press Ctrl+C to stop")
+        try:
+            while True:
+                self.update()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
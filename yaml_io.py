@@ -0,0 +1,29 @@
+# PyYAML takes a noticeable time to import, so this module is only imported by the code loading
+# or saving .yaml files, when it does so, and never by modules imported at startup
+import yaml
+
+# Use LibYAML based loader and dumper when PyYAML was built with it, as they are way faster
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
+
+def load_yaml(file):
+    """
+    Load the content of a .yaml file
+
+    :param file: Opened .yaml file
+    :return: Content of the file, or None if it is empty
+    """
+    return yaml.load(file, Loader=YamlLoader)
+
+
+def dump_yaml(data, file):
+    """
+    Save some content as a .yaml file
+
+    :param data: Content to save
+    :param file: Opened .yaml file to write
+    """
+    yaml.dump(data, file, Dumper=YamlDumper)